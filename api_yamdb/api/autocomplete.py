@@ -0,0 +1,301 @@
+"""Подсказки по началу названия произведения из памяти процесса.
+
+Нормализованные названия и их хвосты с начала каждого слова лежат в
+отсортированном массиве, диапазон префикса находится двоичным поиском.
+Для коротких префиксов, под которые попадает большая часть каталога,
+лучшие произведения посчитаны заранее. Длинный префикс с диапазоном
+больше `MAX_SCAN` начинает ответ с готового списка своего короткого
+префикса: попавшие в него совпадения - точно лучшие. Остаток берётся
+из первых `MAX_SCAN` совпадений по алфавиту, пока в них не наберётся
+нужное число произведений.
+
+Индекс строится при запуске (или на первом запросе) и дальше
+обновляется сигналами сохранения и удаления произведений. Изменения
+из других процессов видны по версии Title в кеше ответов: тогда индекс
+перестраивается в фоновом потоке, а запросы обслуживает прежний.
+Рейтинг и число отзывов меняются без сохранения произведения, поэтому
+порядок по популярности обновляется в фоне раз в `MAX_AGE` секунд.
+"""
+import heapq
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.db import connection
+
+from api.cache import get_versions
+from api.fields import normalize_search
+from reviews.models import Title
+
+MAX_LIMIT = 20
+# Префиксы не длиннее этого получают готовые списки лучших.
+PRECOMPUTED_LENGTH = 2
+# Сколько записей диапазона длинного префикса просматривать целиком.
+MAX_SCAN = 1000
+MAX_AGE = 60
+
+
+def _popularity(pk, weighted_rating, reviews_count):
+    """Ключ сортировки: рейтинг, число отзывов, без рейтинга - в конце."""
+    if weighted_rating is None:
+        return (1, 0, -reviews_count, pk)
+    return (0, -weighted_rating, -reviews_count, pk)
+
+
+def _word_suffixes(name):
+    """Название целиком и его хвосты, начинающиеся с каждого слова."""
+    words = normalize_search(name).split()
+    return {' '.join(words[start:]) for start in range(len(words))}
+
+
+def _short_prefixes(keys):
+    return {
+        key[:length]
+        for key in keys
+        for length in range(1, min(len(key), PRECOMPUTED_LENGTH) + 1)
+    }
+
+
+class TitleIndex:
+
+    def __init__(self, rows):
+        # Поиск и правки из сигналов могут идти в разных потоках.
+        self.lock = threading.Lock()
+        self.titles = {}
+        self.popularity = {}
+        self.groups = {}
+        entries = []
+        for pk, name, year, weighted_rating, reviews_count in rows:
+            self.titles[pk] = {'id': pk, 'name': name, 'year': year}
+            self.popularity[pk] = _popularity(
+                pk, weighted_rating, reviews_count
+            )
+            keys = _word_suffixes(name)
+            entries.extend((key, pk) for key in keys)
+            for prefix in _short_prefixes(keys):
+                self.groups.setdefault(prefix, set()).add(pk)
+        # Пары (ключ, pk): точное место записи находится двоичным поиском.
+        entries.sort()
+        self.entries = entries
+        self.precomputed = self._precompute()
+
+    @classmethod
+    def load(cls):
+        return cls(Title.objects.values_list(
+            'pk', 'name', 'year', 'weighted_rating', 'reviews_count'
+        ).iterator())
+
+    def _best(self, pks, limit):
+        return heapq.nsmallest(limit, pks, key=self.popularity.__getitem__)
+
+    def _precompute(self):
+        return {
+            prefix: self._best(pks, MAX_LIMIT)
+            for prefix, pks in self.groups.items()
+        }
+
+    def _rerank(self, prefix, pk):
+        """Поправляет готовый список префикса после правки одного `pk`."""
+        pks = self.groups.get(prefix)
+        if not pks:
+            self.precomputed.pop(prefix, None)
+            return
+        best = self.precomputed.get(prefix, [])
+        if pk in best and len(pks) >= MAX_LIMIT:
+            # `pk` мог уйти из лучших, а следующего кандидата знает только
+            # группа.
+            self.precomputed[prefix] = self._best(pks, MAX_LIMIT)
+            return
+        best = [other for other in best if other != pk]
+        if pk in pks:
+            best.append(pk)
+            best.sort(key=self.popularity.__getitem__)
+        self.precomputed[prefix] = best[:MAX_LIMIT]
+
+    def _discard(self, pk):
+        title = self.titles.pop(pk, None)
+        if title is None:
+            return set()
+        keys = _word_suffixes(title['name'])
+        for key in keys:
+            del self.entries[bisect_left(self.entries, (key, pk))]
+        prefixes = _short_prefixes(keys)
+        for prefix in prefixes:
+            self.groups[prefix].discard(pk)
+            if not self.groups[prefix]:
+                del self.groups[prefix]
+        return prefixes
+
+    def update(self, pk, name, year, weighted_rating, reviews_count):
+        """Добавляет произведение или заменяет его название и рейтинг."""
+        with self.lock:
+            prefixes = self._discard(pk)
+            self.titles[pk] = {'id': pk, 'name': name, 'year': year}
+            self.popularity[pk] = _popularity(
+                pk, weighted_rating, reviews_count
+            )
+            keys = _word_suffixes(name)
+            for key in keys:
+                insort(self.entries, (key, pk))
+            for prefix in _short_prefixes(keys):
+                self.groups.setdefault(prefix, set()).add(pk)
+                prefixes.add(prefix)
+            for prefix in prefixes:
+                self._rerank(prefix, pk)
+
+    def remove(self, pk):
+        with self.lock:
+            for prefix in self._discard(pk):
+                self._rerank(prefix, pk)
+            self.popularity.pop(pk, None)
+
+    def refresh_popularity(self, rows):
+        """Обновляет порядок по строкам (pk, рейтинг, число отзывов)."""
+        popularity = {
+            pk: _popularity(pk, weighted_rating, reviews_count)
+            for pk, weighted_rating, reviews_count in rows
+        }
+        with self.lock:
+            # Произведения, добавленные после чтения строк, сохраняют ключ.
+            self.popularity.update(
+                (pk, key) for pk, key in popularity.items()
+                if pk in self.titles
+            )
+            self.precomputed = self._precompute()
+
+    def search(self, query, limit):
+        """Лучшие `limit` произведений со словом, начинающимся с `query`."""
+        prefix = ' '.join(normalize_search(query).split())
+        if not prefix:
+            return []
+        with self.lock:
+            if len(prefix) <= PRECOMPUTED_LENGTH:
+                pks = self.precomputed.get(prefix, [])[:limit]
+            else:
+                pks = self._search_long(prefix, limit)
+            return [self.titles[pk] for pk in pks]
+
+    def _search_long(self, prefix, limit):
+        start = bisect_left(self.entries, (prefix,))
+        end = bisect_left(self.entries, (prefix + '\U0010ffff',), start)
+        if end - start <= MAX_SCAN:
+            return self._best({pk for _, pk in self.entries[start:end]}, limit)
+        # Совпадение из лучших по короткому префиксу лучше всех
+        # остальных совпадений.
+        best = [
+            pk for pk in self.precomputed.get(prefix[:PRECOMPUTED_LENGTH], [])
+            if any(
+                key.startswith(prefix)
+                for key in _word_suffixes(self.titles[pk]['name'])
+            )
+        ][:limit]
+        need = limit - len(best)
+        rest = set()
+        for position in range(start, end):
+            if not need or position - start >= MAX_SCAN and len(rest) >= need:
+                break
+            pk = self.entries[position][1]
+            if pk not in best:
+                rest.add(pk)
+        return best + self._best(rest, need)
+
+
+# changes - число правок из сигналов: правки во время фоновой
+# пересборки в неё могут не попасть.
+_state = {'index': None, 'version': None, 'refreshed': 0, 'changes': 0}
+_worker = {'thread': None}
+
+
+def _current_version():
+    return get_versions([Title])[0]
+
+
+def _in_background(task):
+    """Запускает `task` в фоне, если там не выполняется другая задача."""
+    thread = _worker['thread']
+    if thread is not None and thread.is_alive():
+        return
+
+    def run():
+        try:
+            task()
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=run, daemon=True)
+    _worker['thread'] = thread
+    thread.start()
+
+
+def rebuild_index():
+    """Строит индекс заново и запоминает версию, по которой он собран."""
+    version = _current_version()
+    changes = _state['changes']
+    index = TitleIndex.load()
+    if _state['changes'] != changes:
+        # Правка из сигнала пришлась на сборку: пересоберём ещё раз.
+        version = None
+    _state.update(index=index, version=version, refreshed=time.monotonic())
+    return index
+
+
+def refresh_popularity():
+    index = _state['index']
+    if index is None:
+        return
+    index.refresh_popularity(Title.objects.values_list(
+        'pk', 'weighted_rating', 'reviews_count'
+    ).iterator())
+    _state['refreshed'] = time.monotonic()
+
+
+def get_index():
+    index = _state['index']
+    if index is None:
+        return rebuild_index()
+    if _state['version'] != _current_version():
+        _in_background(rebuild_index)
+    elif time.monotonic() - _state['refreshed'] > MAX_AGE:
+        _in_background(refresh_popularity)
+    return index
+
+
+def is_current():
+    """Собран ли индекс по текущей версии Title.
+
+    Вызывается до фиксации транзакции, пока версия ещё не сменилась.
+    """
+    return _state['index'] is not None and (
+        _state['version'] == _current_version()
+    )
+
+
+def _applied(was_current):
+    _state['changes'] += 1
+    if was_current:
+        # Версию сменила сама эта правка, индекс остаётся актуальным.
+        _state['version'] = _current_version()
+
+
+def index_title(title, was_current):
+    """Обновляет произведение в индексе после фиксации его сохранения."""
+    index = _state['index']
+    if index is None:
+        return
+    index.update(
+        title.pk, title.name, title.year, title.weighted_rating,
+        title.reviews_count,
+    )
+    _applied(was_current)
+
+
+def unindex_title(pk, was_current):
+    index = _state['index']
+    if index is None:
+        return
+    index.remove(pk)
+    _applied(was_current)
+
+
+def autocomplete_titles(query, limit=10):
+    return get_index().search(query, limit)
@@ -0,0 +1,83 @@
+from django.db import connection, transaction
+
+from api.cache import bump_version
+from api.serializers import TitlesBulkItemSerializer
+from reviews.counters import TITLES, change_counter
+from reviews.models import Category, Genres, GenreTitle, Title
+from reviews.search import index_titles
+
+
+def _slugs(items, field):
+    slugs = set()
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        value = item.get(field)
+        values = value if isinstance(value, list) else [value]
+        slugs.update(slug for slug in values if isinstance(slug, str))
+    return slugs
+
+
+def _insert_titles(titles):
+    Title.objects.bulk_create(titles)
+    if connection.features.can_return_rows_from_bulk_insert:
+        return
+    # SQLite в Django 3.2 не возвращает ключи из bulk_create. Вставка в
+    # транзакции держит блокировку записи, поэтому последние id - наши.
+    pks = Title.objects.order_by('-pk').values_list(
+        'pk', flat=True
+    )[:len(titles)]
+    for title, pk in zip(titles, reversed(list(pks))):
+        title.pk = pk
+
+
+def bulk_create_titles(items):
+    """Создаёт произведения пачкой.
+
+    Категории и жанры всех элементов читаются двумя запросами,
+    произведения и связи с жанрами вставляются пакетно в одной
+    транзакции. Возвращает список `(индекс, произведение)` созданных
+    и словарь `{индекс: ошибки}` отклонённых элементов.
+    """
+    context = {
+        'categories': Category.objects.in_bulk(
+            _slugs(items, 'category'), field_name='slug'
+        ),
+        'genres': Genres.objects.in_bulk(
+            _slugs(items, 'genre'), field_name='slug'
+        ),
+    }
+    valid, errors = [], {}
+    for index, item in enumerate(items):
+        serializer = TitlesBulkItemSerializer(data=item, context=context)
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+        else:
+            errors[index] = serializer.errors
+    if not valid:
+        return [], errors
+
+    created = []
+    links = []
+    with transaction.atomic():
+        titles = []
+        for index, data in valid:
+            data = dict(data)
+            genres = data.pop('genre')
+            title = Title(**data)
+            titles.append(title)
+            created.append((index, title))
+            links.append((title, genres))
+        _insert_titles(titles)
+        GenreTitle.objects.bulk_create(
+            GenreTitle(title=title, genre=genre)
+            for title, genres in links
+            for genre in genres
+        )
+        # bulk_create не вызывает сигналы: индекс, счётчик и кеш
+        # обновляем сами.
+        index_titles(title.pk for title in titles)
+        change_counter(TITLES, len(titles))
+        for model in (Title, GenreTitle):
+            transaction.on_commit(lambda model=model: bump_version(model))
+    return created, errors
@@ -0,0 +1,159 @@
+import hashlib
+import threading
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+KEY_PREFIX = 'response-cache'
+# Счётчики попаданий в памяти процесса: запись в общий кеш на каждом
+# GET дорога, а на файловом бэкенде ещё и теряет инкременты.
+_stats = {'hits': 0, 'misses': 0}
+_stats_lock = threading.Lock()
+# Заголовки, которые выставляет рендерер, а не представление.
+SKIP_HEADERS = ('content-type', 'x-cache')
+
+
+def get_cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def _version_key(model):
+    return f'{KEY_PREFIX}:version:{model._meta.label_lower}'
+
+
+def _new_version():
+    # Случайная метка вместо счётчика: одна запись без чтения, поэтому
+    # одновременные изменения не теряются ни на одном бэкенде, а
+    # пропавшая из кеша версия не повторит прежнюю.
+    return uuid.uuid4().hex
+
+
+def bump_version(model):
+    """Делает недействительными все ответы, зависящие от модели."""
+    get_cache().set(_version_key(model), _new_version(), None)
+
+
+def get_versions(models):
+    cache = get_cache()
+    keys = [_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _new_version(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def get_stats():
+    """Попадания и промахи кеша в этом процессе с его запуска."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def _fingerprint(request, *parts):
+    params = '&'.join(
+        f'{name}={value}'
+        for name, values in sorted(request.query_params.lists())
+        for value in values
+    )
+    raw = '|'.join(
+        [f'{request.get_host()}{request.path}?{params}', *map(str, parts)]
+    )
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def build_key(request, models):
+    """Ключ из версий моделей, хоста, пути и отсортированных параметров."""
+    return f'{KEY_PREFIX}:{_fingerprint(request, *get_versions(models))}'
+
+
+def build_etag(request, models, revision=None):
+    """Сильный ETag из версий моделей и ревизии ресурса, без сериализации
+    ответа."""
+    return quote_etag(_fingerprint(
+        request, request.accepted_media_type, revision,
+        *get_versions(models)
+    ))
+
+
+def _models(models, depends, view):
+    if depends is None:
+        return models
+    return (*models, *depends(view))
+
+
+def cache_response(*models, depends=None):
+    """Кеширует данные ответа до изменения любой из моделей `models`.
+
+    `depends(view)` - модели, от которых ответ зависит не всегда,
+    например только при `?expand=`.
+    """
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            cache = get_cache()
+            key = build_key(request, _models(models, depends, view))
+            cached = cache.get(key)
+            if cached is not None:
+                _count('hits')
+                data, headers = cached
+                response = Response(data, headers=headers)
+                response['X-Cache'] = 'HIT'
+                return response
+
+            _count('misses')
+            response = method(view, request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                headers = {
+                    name: value for name, value in response.items()
+                    if name.lower() not in SKIP_HEADERS
+                }
+                cache.set(key, (response.data, headers))
+            response['X-Cache'] = 'MISS'
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def etag_response(*models, revision=None, depends=None):
+    """Отвечает 304 на If-None-Match, пока модели `models` не менялись.
+
+    `revision(view)` - ревизия самого ресурса: с ней ответ не зависит от
+    правок чужих строк тех же таблиц. Может поднять 404. `depends` - как
+    у `cache_response`.
+    """
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            etag = build_etag(
+                request, _models(models, depends, view),
+                revision(view) if revision is not None else None,
+            )
+            if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+            if if_none_match and etag in parse_etags(if_none_match):
+                return Response(
+                    status=status.HTTP_304_NOT_MODIFIED,
+                    headers={'ETag': etag},
+                )
+            response = method(view, request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                response['ETag'] = etag
+            return response
+
+        return wrapper
+
+    return decorator
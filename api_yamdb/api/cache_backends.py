@@ -0,0 +1,112 @@
+import pickle
+
+import redis
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.exceptions import ImproperlyConfigured
+
+# Ключи clear() удаляются пачками, чтобы не держать их все в памяти.
+CLEAR_BATCH_SIZE = 1000
+
+
+class RedisCache(BaseCache):
+    """Минимальный кеш-бэкенд для Redis (в Django 3.2 его нет).
+
+    Требует пакет `redis`; LOCATION - URL вида `redis://host:port/db`.
+    KEY_PREFIX обязателен: clear() удаляет только ключи с ним, не трогая
+    чужие данные в той же базе Redis.
+    """
+
+    def __init__(self, server, params):
+        super().__init__(params)
+        if not self.key_prefix:
+            raise ImproperlyConfigured(
+                'RedisCache requires a non-empty KEY_PREFIX.'
+            )
+        self._client = redis.Redis.from_url(server)
+
+    def _timeout(self, timeout):
+        if timeout == DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return None
+        return max(int(timeout), 0)
+
+    def _key(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self._timeout(timeout)
+        if timeout == 0:
+            return False
+        return bool(self._client.set(
+            self._key(key, version), pickle.dumps(value), ex=timeout, nx=True
+        ))
+
+    def get(self, key, default=None, version=None):
+        value = self._client.get(self._key(key, version))
+        if value is None:
+            return default
+        return pickle.loads(value)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self._timeout(timeout)
+        key = self._key(key, version)
+        if timeout == 0:
+            self._client.delete(key)
+            return
+        self._client.set(key, pickle.dumps(value), ex=timeout)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self._timeout(timeout)
+        key = self._key(key, version)
+        if timeout is None:
+            return bool(self._client.persist(key))
+        return bool(self._client.expire(key, timeout))
+
+    def delete(self, key, version=None):
+        return bool(self._client.delete(self._key(key, version)))
+
+    def has_key(self, key, version=None):
+        return bool(self._client.exists(self._key(key, version)))
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        # Значения хранятся в pickle, поэтому инкремент делаем в транзакции.
+        with self._client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(key)
+                    value = pipe.get(key)
+                    if value is None:
+                        raise ValueError(f"Key '{key}' not found")
+                    new_value = pickle.loads(value) + delta
+                    ttl = pipe.ttl(key)
+                    pipe.multi()
+                    pipe.set(
+                        key, pickle.dumps(new_value),
+                        ex=ttl if ttl > 0 else None,
+                    )
+                    pipe.execute()
+                    return new_value
+                except redis.WatchError:
+                    continue
+
+    def clear(self):
+        # make_key даёт `<KEY_PREFIX>:<version>:<key>`; спецсимволы
+        # шаблона в префиксе экранируем.
+        pattern = ''.join(
+            f'\\{char}' if char in '*?[]\\' else char
+            for char in self.key_prefix
+        ) + ':*'
+        batch = []
+        for key in self._client.scan_iter(
+            match=pattern, count=CLEAR_BATCH_SIZE
+        ):
+            batch.append(key)
+            if len(batch) >= CLEAR_BATCH_SIZE:
+                self._client.delete(*batch)
+                batch = []
+        if batch:
+            self._client.delete(*batch)
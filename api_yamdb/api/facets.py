@@ -0,0 +1,54 @@
+from django.db.models import CharField, Count, F, Value
+from django.db.models.functions import Cast
+
+from reviews.models import GenreTitle, Title
+
+
+def _facet(name):
+    return Value(name, output_field=CharField())
+
+
+def get_title_facets(queryset, year_bucket=10):
+    """Считает произведения по жанрам, категориям и годам.
+
+    Все три группировки объединяются через UNION ALL и выполняются
+    одним запросом к БД.
+    """
+    title_ids = queryset.order_by().values('pk')
+    genres = GenreTitle.objects.filter(title__in=title_ids).values(
+        facet=_facet('genre'),
+        key=F('genre__slug'),
+        label=F('genre__name'),
+    ).annotate(count=Count('title', distinct=True))
+    categories = Title.objects.filter(
+        pk__in=title_ids, category__isnull=False
+    ).values(
+        facet=_facet('category'),
+        key=F('category__slug'),
+        label=F('category__name'),
+    ).annotate(count=Count('pk'))
+    years = Title.objects.filter(pk__in=title_ids).values(
+        facet=_facet('year'),
+        key=Cast(F('year') / year_bucket * year_bucket, CharField()),
+        label=_facet(''),
+    ).annotate(count=Count('pk'))
+
+    facets = {'genre': [], 'category': [], 'year': []}
+    for row in genres.union(categories, years, all=True):
+        if row['facet'] == 'year':
+            start = int(row['key'])
+            facets['year'].append({
+                'from': start,
+                'to': start + year_bucket - 1,
+                'count': row['count'],
+            })
+        else:
+            facets[row['facet']].append({
+                'name': row['label'],
+                'slug': row['key'],
+                'count': row['count'],
+            })
+    for facet in ('genre', 'category'):
+        facets[facet].sort(key=lambda item: (-item['count'], item['slug']))
+    facets['year'].sort(key=lambda item: item['from'])
+    return facets
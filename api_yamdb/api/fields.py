@@ -0,0 +1,49 @@
+import unicodedata
+
+from django.db import models
+from django.db.models import Lookup
+
+
+def normalize_search(value):
+    """Приводит строку к виду для поиска без учёта регистра."""
+    if value is None:
+        return ''
+    return unicodedata.normalize('NFKC', str(value)).casefold()
+
+
+class NormalizedCharField(models.CharField):
+    """Теневое поле с нормализованной копией поля `source`.
+
+    Значение пересчитывается в `pre_save`, то есть и при `save()`,
+    и при `bulk_create()`.
+    """
+
+    def __init__(self, *args, source=None, **kwargs):
+        self.source = source
+        kwargs.setdefault('editable', False)
+        kwargs.setdefault('db_index', True)
+        kwargs.setdefault('default', '')
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['source'] = self.source
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        value = normalize_search(getattr(model_instance, self.source))
+        setattr(model_instance, self.attname, value)
+        return value
+
+
+@NormalizedCharField.register_lookup
+class Prefix(Lookup):
+    """Поиск по префиксу через диапазон, который обслуживает индекс."""
+    lookup_name = 'prefix'
+
+    def as_sql(self, compiler, connection):
+        lhs_sql, lhs_params = self.process_lhs(compiler, connection)
+        return (
+            f'({lhs_sql} >= %s AND {lhs_sql} < %s)',
+            [*lhs_params, self.rhs, *lhs_params, self.rhs + '\U0010ffff'],
+        )
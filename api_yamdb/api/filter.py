@@ -1,12 +1,108 @@
-from django_filters.rest_framework import CharFilter, FilterSet
+from django.db.models import Exists, OuterRef
+from django.db.models.constants import LOOKUP_SEP
+from django_filters.rest_framework import (CharFilter, ChoiceFilter,
+                                           FilterSet, NumberFilter)
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import SearchFilter
 
-from reviews.models import Title
+from api.fields import normalize_search
+from reviews import search
+from reviews.models import GenreTitle, Title
 
 
 class GenreFilter(FilterSet):
-    genre = CharFilter(field_name='genre__slug', lookup_expr='exact')
+    """Фильтр произведений.
+
+    `genre` принимает несколько слагов через запятую; `genre_match=all`
+    требует все жанры, по умолчанию достаточно любого. Жанры
+    проверяются подзапросами EXISTS по индексу (title, genre), без JOIN,
+    который размножал бы строки.
+    """
+    GENRE_MATCH_CHOICES = (('any', 'Любой из жанров'), ('all', 'Все жанры'))
+
+    genre = CharFilter(method='filter_genre')
+    genre_match = ChoiceFilter(
+        choices=GENRE_MATCH_CHOICES, method='filter_genre_match'
+    )
     category = CharFilter(field_name='category__slug', lookup_expr='exact')
+    year_from = NumberFilter(field_name='year', lookup_expr='gte')
+    year_to = NumberFilter(field_name='year', lookup_expr='lte')
 
     class Meta:
         model = Title
         fields = ('year', 'category', 'genre', 'name')
+
+    def filter_genre(self, queryset, name, value):
+        slugs = list(dict.fromkeys(
+            slug.strip() for slug in value.split(',') if slug.strip()
+        ))
+        if not slugs:
+            return queryset
+        links = GenreTitle.objects.filter(title=OuterRef('pk'))
+        if self.form.cleaned_data.get('genre_match') == 'all':
+            for slug in slugs:
+                queryset = queryset.filter(
+                    Exists(links.filter(genre__slug=slug))
+                )
+            return queryset
+        return queryset.filter(Exists(links.filter(genre__slug__in=slugs)))
+
+    def filter_genre_match(self, queryset, name, value):
+        # Учитывается в filter_genre.
+        return queryset
+
+
+class NormalizedSearchFilter(SearchFilter):
+    """`SearchFilter` по нормализованным теневым полям.
+
+    Термины приводятся к тому же виду, что и поля при сохранении,
+    поэтому регистр кириллицы не важен, а lower() в запросе не нужен.
+    Префикс `^` ищет по диапазону значений и использует индекс.
+    Поиск подстроки индекс не использует, поэтому включается явно:
+    `?search_match=contains` снимает `^` с полей представления.
+    """
+    lookup_prefixes = {**SearchFilter.lookup_prefixes, '^': 'prefix'}
+    search_match_param = 'search_match'
+    search_match_choices = ('prefix', 'contains')
+    search_match_message = 'Допустимые значения: {choices}.'
+
+    def get_search_fields(self, view, request):
+        fields = super().get_search_fields(view, request)
+        match = request.query_params.get(self.search_match_param, 'prefix')
+        if match not in self.search_match_choices:
+            raise ValidationError({self.search_match_param: [
+                self.search_match_message.format(
+                    choices=', '.join(self.search_match_choices)
+                )
+            ]})
+        if match == 'contains':
+            return [str(field).lstrip('^') for field in fields]
+        return fields
+
+    def get_search_terms(self, request):
+        return [
+            normalize_search(term)
+            for term in super().get_search_terms(request)
+        ]
+
+    def construct_search(self, field_name):
+        lookup = self.lookup_prefixes.get(field_name[0])
+        if lookup:
+            field_name = field_name[1:]
+        else:
+            lookup = 'contains'
+        return LOOKUP_SEP.join([field_name, lookup])
+
+
+class TitleSearchFilter(NormalizedSearchFilter):
+    """Поиск по полнотекстовому индексу с сортировкой по релевантности.
+
+    Без индекса (не SQLite) работает как `NormalizedSearchFilter`
+    по `search_fields` представления.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms or not search.is_available():
+            return super().filter_queryset(request, queryset, view)
+        return search.search_titles(queryset, terms)
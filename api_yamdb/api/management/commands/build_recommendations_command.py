@@ -0,0 +1,45 @@
+from django.core.management import BaseCommand
+
+from reviews.recommendations import (CHUNK_SIZE, MEMORY_MB, NEIGHBOURS,
+                                     TOP_K, rebuild_recommendations)
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рекомендации пользователей по их оценкам'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top', type=int, default=TOP_K,
+            help='Сколько рекомендаций хранить для каждого пользователя',
+        )
+        parser.add_argument(
+            '--neighbours', type=int, default=NEIGHBOURS,
+            help='Сколько похожих произведений учитывать для каждого',
+        )
+        parser.add_argument(
+            '--block-size', type=int, default=None,
+            help=(
+                'Сколько произведений обрабатывать за проход по оценкам; '
+                'по умолчанию подбирается по --memory-mb'
+            ),
+        )
+        parser.add_argument(
+            '--memory-mb', type=int, default=MEMORY_MB,
+            help='Память под накопители сходства и буферы пар, МБ',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=CHUNK_SIZE,
+            help='Сколько строк оценок читать из БД за раз',
+        )
+
+    def handle(self, *args, **kwargs):
+        created = rebuild_recommendations(
+            top=kwargs['top'],
+            neighbours=kwargs['neighbours'],
+            block_size=kwargs['block_size'],
+            chunk_size=kwargs['chunk_size'],
+            memory_mb=kwargs['memory_mb'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Сохранено рекомендаций: {created}'
+        ))
@@ -0,0 +1,38 @@
+from django.core.management import BaseCommand
+
+from api.cache import bump_version
+from reviews.models import SimilarTitle
+from reviews.similarity import (CHUNK_SIZE, MEMORY_MB, TOP_K,
+                                rebuild_similar_titles)
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает похожие произведения по общим жанрам и категории'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top', type=int, default=TOP_K,
+            help='Сколько похожих произведений хранить для каждого',
+        )
+        parser.add_argument(
+            '--memory-mb', type=int, default=MEMORY_MB,
+            help='Память под блок сравниваемых наборов признаков, МБ',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=CHUNK_SIZE,
+            help='Сколько строк каталога читать из БД за раз',
+        )
+
+    def handle(self, *args, **kwargs):
+        created = rebuild_similar_titles(
+            top=kwargs['top'],
+            memory_mb=kwargs['memory_mb'],
+            chunk_size=kwargs['chunk_size'],
+        )
+        # bulk_create не вызывает сигналы, кеш ответов сбрасываем сами.
+        bump_version(SimilarTitle)
+        self.stdout.write(self.style.SUCCESS(
+            f'Сохранено пар похожих произведений: {created}'
+        ))
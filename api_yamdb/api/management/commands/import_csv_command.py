@@ -5,6 +5,9 @@ from django.core.management import BaseCommand
 
 from reviews.models import (Category, Comment, Genres,
                             Review, Title, User, GenreTitle,)
+from reviews.counters import rebuild_counters
+from reviews.ratings import rebuild_title_ratings
+from reviews.search import rebuild_search_index
 
 TABLES = {
     Category: 'category.csv',
@@ -29,4 +32,9 @@ class Command(BaseCommand):
                 reader = csv.DictReader(csv_file)
                 model.objects.bulk_create(
                     model(**data) for data in reader)
+        # bulk_create не вызывает сигналы, поэтому рейтинги, счётчики и
+        # поисковый индекс строим заново.
+        rebuild_title_ratings()
+        rebuild_counters()
+        rebuild_search_index()
         self.stdout.write(self.style.SUCCESS('Все данные загружены'))
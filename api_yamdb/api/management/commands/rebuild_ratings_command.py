@@ -0,0 +1,25 @@
+from django.core.management import BaseCommand, CommandError
+
+from reviews.ratings import find_rating_mismatches, rebuild_title_ratings
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает и проверяет рейтинги произведений'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только проверить рейтинги, ничего не изменяя',
+        )
+
+    def handle(self, *args, **kwargs):
+        if not kwargs['check']:
+            updated = rebuild_title_ratings()
+            self.stdout.write(f'Пересчитано произведений: {updated}')
+        mismatches = find_rating_mismatches()
+        if mismatches:
+            raise CommandError(
+                f'Рейтинг расходится с отзывами у произведений: {mismatches}'
+            )
+        self.stdout.write(self.style.SUCCESS('Рейтинги согласованы'))
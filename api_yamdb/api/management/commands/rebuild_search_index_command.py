@@ -0,0 +1,11 @@
+from django.core.management import BaseCommand
+
+from reviews.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает полнотекстовый индекс произведений'
+
+    def handle(self, *args, **kwargs):
+        rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS('Поисковый индекс перестроен'))
@@ -0,0 +1,36 @@
+from django.core.management import BaseCommand
+
+from reviews.models import RatingPrior
+from reviews.ratings import catalog_mean_score
+
+
+class Command(BaseCommand):
+    help = (
+        'Обновляет параметры взвешенного рейтинга и пересчитывает его '
+        'у всех произведений'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--mean', type=float,
+            help='Средняя оценка; по умолчанию считается по отзывам',
+        )
+        parser.add_argument(
+            '--min-votes', type=int, help='Минимальное число оценок',
+        )
+
+    def handle(self, *args, **kwargs):
+        prior = RatingPrior.get()
+        mean = kwargs['mean']
+        if mean is None:
+            mean = catalog_mean_score()
+        if mean is not None:
+            prior.mean = mean
+        if kwargs['min_votes'] is not None:
+            prior.min_votes = kwargs['min_votes']
+        # Сохранение запускает пересчёт взвешенного рейтинга.
+        prior.save()
+        self.stdout.write(self.style.SUCCESS(
+            f'Средняя оценка {prior.mean:.3f}, '
+            f'минимум оценок {prior.min_votes}'
+        ))
@@ -0,0 +1,178 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from types import SimpleNamespace
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework import exceptions
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(LimitOffsetPagination):
+    """Постраничный вывод с опциональным режимом курсора.
+
+    Без параметра `cursor` работает как `LimitOffsetPagination`, но
+    не считает COUNT(*) по всей выборке. Для нефильтрованного списка
+    количество берётся из `view.get_total_count()`, если вьюсет его
+    поддерживает, иначе строки считаются не дальше `count_limit`;
+    `count_exact` в ответе говорит, точное ли значение `count`.
+    С параметром `cursor` (пустым для первой страницы) страницы
+    выбираются по ключу `ordering` без OFFSET и без COUNT(*). Параметры
+    из `cursor_conflicts` задают свой порядок, поэтому вместе с курсором
+    дают ошибку 400.
+    """
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Некорректный курсор.'
+    cursor_conflict_message = 'Нельзя использовать вместе с `cursor`.'
+    cursor_conflicts = ('ordering',)
+    ordering = ('-id',)
+    count_limit = 1000
+    # Параметры запроса, которые не сужают выборку.
+    unfiltered_params = (
+        'limit', 'offset', 'ordering', 'fields', 'omit', 'search_match',
+    )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.use_cursor = self.cursor_query_param in request.query_params
+        if not self.use_cursor:
+            self.request = request
+            self.view = view
+            return super().paginate_queryset(queryset, request, view)
+
+        conflicts = [
+            param for param in self.cursor_conflicts
+            if request.query_params.get(param)
+        ]
+        if conflicts:
+            raise exceptions.ValidationError({
+                param: [self.cursor_conflict_message] for param in conflicts
+            })
+        self.request = request
+        self.model = queryset.model
+        self.limit = self.get_limit(request)
+        position, reverse = self.decode_cursor(request, queryset.model)
+        ordering = self.get_ordering(reverse)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.after(ordering, position))
+
+        page = list(queryset[:self.limit + 1])
+        has_more = len(page) > self.limit
+        page = page[:self.limit]
+        if reverse:
+            page.reverse()
+        self.has_next = has_more if not reverse else position is not None
+        self.has_previous = position is not None if not reverse else has_more
+        self.page = page
+        return page
+
+    def get_count(self, queryset):
+        get_total_count = getattr(self.view, 'get_total_count', None)
+        if get_total_count and set(self.request.query_params) <= set(
+            self.unfiltered_params
+        ):
+            count = get_total_count()
+            if count is not None:
+                self.count_exact = True
+                return count
+        # Считаем не дальше, чем нужно для ссылки на следующую страницу.
+        bound = max(
+            self.count_limit, self.get_offset(self.request) + self.limit + 1
+        )
+        count = queryset.order_by()[:bound].count()
+        self.count_exact = count < bound
+        return count
+
+    def get_paginated_response(self, data):
+        if not self.use_cursor:
+            response = super().get_paginated_response(data)
+            response.data['count_exact'] = self.count_exact
+            return response
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        if not self.use_cursor:
+            return super().get_next_link()
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.use_cursor:
+            return super().get_previous_link()
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_ordering(self, reverse):
+        if not reverse:
+            return self.ordering
+        return tuple(
+            name[1:] if name.startswith('-') else f'-{name}'
+            for name in self.ordering
+        )
+
+    def after(self, ordering, position):
+        """Условие "строго после позиции" для составного ключа."""
+        condition = Q()
+        equal = Q()
+        for name, value in zip(ordering, position):
+            field = name.lstrip('-')
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{field}__{lookup}': value})
+            equal &= Q(**{field: value})
+        return condition
+
+    def encode_cursor(self, obj, reverse):
+        if isinstance(obj, dict):
+            # Строка values() с ключами по attname полей.
+            obj = SimpleNamespace(**obj)
+        position = [
+            self.model._meta.get_field(name.lstrip('-')).value_to_string(obj)
+            for name in self.ordering
+        ]
+        payload = json.dumps({'p': position, 'r': int(reverse)})
+        cursor = urlsafe_b64encode(payload.encode()).decode()
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.offset_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request, model):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+        try:
+            payload = json.loads(urlsafe_b64decode(cursor.encode()))
+            position, reverse = payload['p'], bool(payload['r'])
+            if len(position) != len(self.ordering):
+                raise ValueError
+            position = [
+                model._meta.get_field(name.lstrip('-')).to_python(value)
+                for name, value in zip(self.ordering, position)
+            ]
+        except (BinasciiError, ValueError, TypeError, KeyError,
+                ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+
+class TitlePagination(KeysetPagination):
+    ordering = ('id',)
+    # Полнотекстовый поиск сортирует по релевантности.
+    cursor_conflicts = ('ordering', 'search')
+
+
+class ReviewPagination(KeysetPagination):
+    ordering = ('-pub_date', '-id')
+
+
+class CommentPagination(KeysetPagination):
+    ordering = ('pub_date', 'id')
@@ -0,0 +1,223 @@
+from django.conf import settings
+from django.utils import timezone
+from django.db.models import OuterRef, Subquery
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+from api.pagination import CommentPagination, ReviewPagination
+from api.serializers import (CommentSerializer, ReviewSerializer,
+                             TitleDetailSerializer, TitlesSerializer)
+from reviews.models import Comment, GenreTitle, Review, Title
+
+
+class _DateTime:
+    """DateTimeField.to_representation с зоной, найденной раз на ответ."""
+    field = serializers.DateTimeField()
+
+    def bind(self):
+        if not settings.USE_TZ or api_settings.DATETIME_FORMAT != ISO_8601:
+            return self.field.to_representation
+        field_timezone = timezone.get_current_timezone()
+
+        def convert(value):
+            if timezone.is_naive(value):
+                return self.field.to_representation(value)
+            value = value.astimezone(field_timezone).isoformat()
+            if value.endswith('+00:00'):
+                value = value[:-6] + 'Z'
+            return value
+        return convert
+
+
+# Остальные преобразования повторяют to_representation полей DRF.
+def _optional(convert):
+    def wrapper(value):
+        return None if value is None else convert(value)
+    return wrapper
+
+
+class RowReader:
+    """Быстрое чтение для list/retrieve без полей DRF.
+
+    Ответ собирается из строк `values()` и словарей связей, прочитанных
+    одним запросом на страницу. Результат совпадает с выводом
+    `serializer_class` байт в байт; `fields` сужает набор полей так же,
+    как `?fields=`/`?omit=`.
+
+    `columns` сопоставляет поле ответа со столбцом `values()` и
+    функцией преобразования значения (или объектом с `bind()`, который
+    её возвращает); остальные поля выводит `render_relation()`.
+    """
+    serializer_class = None
+    columns = {}
+
+    def __init__(self, fields=None):
+        names = self.serializer_class.Meta.fields
+        self.fields = [
+            name for name in names if fields is None or name in fields
+        ]
+
+    def get_columns(self):
+        return {
+            self.columns[name][0] for name in self.fields
+            if name in self.columns
+        }
+
+    def prepare(self, queryset, extra=()):
+        """Queryset строк со столбцами, нужными выбранным полям.
+
+        `extra` - дополнительные столбцы, например ключ пагинации.
+        """
+        return queryset.prefetch_related(None).values(
+            'pk', *self.get_columns(), *extra
+        )
+
+    def load_relations(self, rows):
+        return {}
+
+    def render_relation(self, name, row, relations):
+        """Значение поля без столбца; неизвестное поле - KeyError."""
+        raise KeyError(name)
+
+    def render(self, rows):
+        rows = list(rows)
+        relations = self.load_relations(rows)
+        columns = []
+        for name in self.fields:
+            column, convert = self.columns.get(name, (None, None))
+            if hasattr(convert, 'bind'):
+                convert = convert.bind()
+            columns.append((name, column, convert))
+        data = []
+        for row in rows:
+            item = {}
+            for name, column, convert in columns:
+                if column is None:
+                    item[name] = self.render_relation(name, row, relations)
+                else:
+                    item[name] = convert(row[column])
+            data.append(item)
+        return data
+
+
+class TitleReader(RowReader):
+    serializer_class = TitlesSerializer
+    columns = {
+        'id': ('id', int),
+        'name': ('name', str),
+        'year': ('year', int),
+        'rating': ('rating', _optional(int)),
+        'weighted_rating': ('weighted_rating', _optional(float)),
+        'reviews_count': ('reviews_count', int),
+        'comments_count': ('comments_count', int),
+        'description': ('description', _optional(str)),
+    }
+
+    def get_columns(self):
+        columns = super().get_columns()
+        if 'category' in self.fields:
+            columns.update(('category__name', 'category__slug'))
+        if 'scores' in self.fields:
+            columns.update(Title.score_fields)
+        return columns
+
+    def load_relations(self, rows):
+        if 'genre' not in self.fields:
+            return {}
+        genres = {row['pk']: [] for row in rows}
+        links = GenreTitle.objects.filter(
+            title_id__in=genres
+        ).order_by('pk').values_list(
+            'title_id', 'genre__name', 'genre__slug'
+        )
+        for title_id, name, slug in links:
+            genres[title_id].append({'name': name, 'slug': slug})
+        return {'genre': genres}
+
+    def render_relation(self, name, row, relations):
+        if name == 'genre':
+            return relations['genre'][row['pk']]
+        if name == 'category':
+            if row['category__slug'] is None:
+                return None
+            return {
+                'name': row['category__name'],
+                'slug': row['category__slug'],
+            }
+        if name == 'scores':
+            return {
+                field.split('_')[1]: row[field]
+                for field in Title.score_fields
+            }
+        return super().render_relation(name, row, relations)
+
+
+class TitleDetailReader(TitleReader):
+    serializer_class = TitleDetailSerializer
+
+
+class ReviewReader(RowReader):
+    serializer_class = ReviewSerializer
+    columns = {
+        'id': ('id', int),
+        'text': ('text', str),
+        'author': ('author__username', _optional(str)),
+        'score': ('score', _optional(int)),
+        'pub_date': ('pub_date', _DateTime()),
+        'comments_count': ('comments_count', int),
+    }
+
+
+class CommentReader(RowReader):
+    serializer_class = CommentSerializer
+    columns = {
+        'id': ('id', int),
+        'text': ('text', str),
+        'author': ('author__username', _optional(str)),
+        'pub_date': ('pub_date', _DateTime()),
+    }
+
+
+def read_first_comments(review_ids, limit):
+    """Первые `limit` комментариев каждого отзыва одним запросом."""
+    ordering = CommentPagination.ordering
+    first = Comment.objects.filter(
+        review=OuterRef('review')
+    ).order_by(*ordering).values('pk')[:limit]
+    reader = CommentReader()
+    rows = list(reader.prepare(
+        Comment.objects.filter(
+            review_id__in=review_ids, pk__in=Subquery(first)
+        ).order_by('review_id', *ordering),
+        extra=('review_id',),
+    ))
+    comments = {review_id: [] for review_id in review_ids}
+    for row, item in zip(rows, reader.render(rows)):
+        comments[row['review_id']].append(item)
+    return comments
+
+
+def read_title_reviews(title_id, count, limit, comments_limit=None):
+    """Первая страница отзывов произведения.
+
+    С `comments_limit` к каждому отзыву добавляются его первые
+    комментарии. Счётчики берутся из поддерживаемых полей.
+    """
+    reader = ReviewReader()
+    rows = list(reader.prepare(
+        Review.objects.filter(title_id=title_id).order_by(
+            *ReviewPagination.ordering
+        ),
+        extra=('comments_count',),
+    )[:limit])
+    results = reader.render(rows)
+    if comments_limit is not None:
+        comments = read_first_comments(
+            [row['pk'] for row in rows], comments_limit
+        )
+        for row, item in zip(rows, results):
+            item['comments'] = {
+                'count': row['comments_count'],
+                'results': comments[row['pk']],
+            }
+    return {'count': count, 'results': results}
@@ -1,35 +1,72 @@
+from django.db.models import Prefetch, prefetch_related_objects
 from rest_framework import serializers
 
+from api.autocomplete import MAX_LIMIT
 from reviews.models import Category, Comment, Genres, Review, Title
 from users.models import User
 from users.validators import no_me_as_username_allowed, UsernameValidator
 
 
+# Жанры произведения в порядке их назначения.
+GENRE_PREFETCH = Prefetch(
+    'genre', queryset=Genres.objects.order_by('genretitle')
+)
+
+
 class CategoriesSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Category
-        exclude = ('id', )
+        exclude = ('id', 'name_search')
 
 
 class GenresSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Genres
-        exclude = ('id', )
+        exclude = ('id', 'name_search')
 
 
 class TitlesSerializer(serializers.ModelSerializer):
     category = CategoriesSerializer()
     genre = GenresSerializer(many=True)
     rating = serializers.IntegerField(read_only=True, default=0)
+    weighted_rating = serializers.FloatField(read_only=True)
+    reviews_count = serializers.IntegerField(read_only=True)
+    comments_count = serializers.IntegerField(read_only=True)
 
     class Meta:
-        fields = ('id', 'name', 'year', 'rating',
-                  'description', 'genre', 'category')
+        fields = ('id', 'name', 'year', 'rating', 'weighted_rating',
+                  'reviews_count', 'comments_count', 'description', 'genre',
+                  'category')
         model = Title
 
 
+class TitleDetailSerializer(TitlesSerializer):
+    scores = serializers.DictField(
+        source='score_histogram', child=serializers.IntegerField(),
+        read_only=True,
+    )
+
+    class Meta(TitlesSerializer.Meta):
+        fields = (*TitlesSerializer.Meta.fields, 'scores')
+
+
+class TopTitlesQuerySerializer(serializers.Serializer):
+    genre = serializers.SlugField(required=False)
+    category = serializers.SlugField(required=False)
+    limit = serializers.IntegerField(
+        required=False, default=10, min_value=1, max_value=100
+    )
+
+
+class AutocompleteQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=256, trim_whitespace=False)
+    limit = serializers.IntegerField(
+        required=False, default=10, min_value=1, max_value=MAX_LIMIT
+    )
+
+
 class TitlesPostSerializer(serializers.ModelSerializer):
     category = serializers.SlugRelatedField(
         slug_field='slug', queryset=Category.objects.all()
@@ -45,9 +82,40 @@ class TitlesPostSerializer(serializers.ModelSerializer):
         model = Title
 
     def to_representation(self, value):
+        prefetch_related_objects([value], 'category', GENRE_PREFETCH)
         return TitlesSerializer(value, context=self.context).data
 
 
+class TitlesBulkItemSerializer(serializers.ModelSerializer):
+    """Элемент пакетной загрузки в формате TitlesPostSerializer.
+
+    Слаги ищутся в словарях `categories` и `genres` из контекста,
+    заранее прочитанных одним запросом на всю пачку.
+    """
+    category = serializers.SlugField()
+    genre = serializers.ListField(child=serializers.SlugField())
+
+    class Meta:
+        fields = ('name', 'year', 'description', 'genre', 'category')
+        model = Title
+
+    def _resolve(self, objects, slug):
+        if slug not in objects:
+            raise serializers.ValidationError(
+                serializers.SlugRelatedField.default_error_messages[
+                    'does_not_exist'
+                ].format(slug_name='slug', value=slug)
+            )
+        return objects[slug]
+
+    def validate_category(self, value):
+        return self._resolve(self.context['categories'], value)
+
+    def validate_genre(self, value):
+        return [self._resolve(self.context['genres'], slug)
+                for slug in dict.fromkeys(value)]
+
+
 class SignUpSerializer(serializers.Serializer):
     email = serializers.EmailField(max_length=254, required=True)
     username = serializers.CharField(max_length=150,
@@ -103,17 +171,7 @@ class ReviewSerializer(serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         read_only=True, slug_field='username'
     )
-
-    def validate(self, data):
-        request = self.context.get('request')
-        if request.method == 'POST':
-            author = request.user
-            title_id = self.context.get('view').kwargs.get('title_id')
-            if author.reviews.filter(title=title_id).exists():
-                raise serializers.ValidationError(
-                    'Вы уже оставили отзыв к этому произведению.'
-                )
-        return data
+    comments_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Review
@@ -123,6 +181,7 @@ class ReviewSerializer(serializers.ModelSerializer):
             'author',
             'score',
             'pub_date',
+            'comments_count',
         )
 
 
@@ -0,0 +1,60 @@
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
+
+from api.autocomplete import index_title, is_current, unindex_title
+from api.cache import bump_version
+from reviews.models import (Category, Comment, Genres, GenreTitle,
+                            RatingPrior, Review, Title)
+from users.models import User
+
+# Модели, от которых зависят закешированные ответы и ETag.
+CACHED_MODELS = (
+    Title, GenreTitle, Genres, Category, Review, Comment, RatingPrior
+)
+
+
+def bump_on_commit(sender, **kwargs):
+    transaction.on_commit(lambda: bump_version(sender))
+
+
+def user_saved(sender, instance, created, **kwargs):
+    # В ответах от пользователя есть только username автора: вход,
+    # код подтверждения и правка профиля кеш не сбрасывают.
+    loaded_values = getattr(instance, '_loaded_values', {})
+    if not created and loaded_values.get('username') != instance.username:
+        bump_on_commit(sender)
+    instance._loaded_values = {**loaded_values, 'username': instance.username}
+
+
+for model in CACHED_MODELS:
+    post_save.connect(bump_on_commit, sender=model)
+    post_delete.connect(bump_on_commit, sender=model)
+m2m_changed.connect(bump_on_commit, sender=Title.genre.through)
+post_save.connect(user_saved, sender=User)
+post_delete.connect(bump_on_commit, sender=User)
+
+
+# До сохранения версия Title ещё прежняя: без транзакции bump_on_commit
+# меняет её сразу в post_save.
+def title_saving(sender, instance, **kwargs):
+    instance._index_was_current = is_current()
+
+
+def title_saved(sender, instance, **kwargs):
+    was_current = instance._index_was_current
+    transaction.on_commit(lambda: index_title(instance, was_current))
+
+
+def title_deleted(sender, instance, **kwargs):
+    was_current = instance._index_was_current
+    pk = instance.pk
+    transaction.on_commit(lambda: unindex_title(pk, was_current))
+
+
+pre_save.connect(title_saving, sender=Title)
+pre_delete.connect(title_saving, sender=Title)
+# Подключаются после bump_on_commit: к вызову индекса версия Title уже
+# сменилась.
+post_save.connect(title_saved, sender=Title)
+post_delete.connect(title_deleted, sender=Title)
@@ -2,8 +2,8 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from api.views import (CategoriesViewSet, CommentViewSet, GenresViewSet,
-                       ReviewViewSet, TitlesViewSet, UserViewSet, signup,
-                       token)
+                       ReviewViewSet, TitlesViewSet, UserViewSet,
+                       cache_stats, signup, token)
 
 router_v1 = DefaultRouter()
 router_v1.register('users', UserViewSet)
@@ -29,4 +29,5 @@ auth_patterns = [
 urlpatterns = [
     path('v1/', include(router_v1.urls)),
     path('v1/auth/', include(auth_patterns)),
+    path('v1/cache/stats/', cache_stats),
 ]
@@ -3,28 +3,71 @@ import uuid
 from django.conf import settings
 from django.core.mail import send_mail
 from django.db import IntegrityError
-from django.db.models import Avg
+from django.http import Http404
 from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_cache_control
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, mixins, status, viewsets
 from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework_simplejwt.tokens import AccessToken
 
-from api.filter import GenreFilter
+from api.autocomplete import autocomplete_titles
+from api.bulk import bulk_create_titles
+from api.cache import cache_response, etag_response, get_stats
+from api.facets import get_title_facets
+from api.filter import (GenreFilter, NormalizedSearchFilter,
+                        TitleSearchFilter)
+from api.pagination import (CommentPagination, ReviewPagination,
+                            TitlePagination)
 from api.permissions import (AdminOrReadOnly, IsAdminOrAuthor,
                              IsAdminOrAuthorOrModerator)
-from api.serializers import (CategoriesSerializer, CommentSerializer,
+from api.readers import (CommentReader, ReviewReader, TitleDetailReader,
+                         TitleReader, read_title_reviews)
+from api.serializers import (GENRE_PREFETCH, AutocompleteQuerySerializer,
+                             CategoriesSerializer, CommentSerializer,
                              GenresSerializer, NoRoleSerializer,
                              ReviewSerializer, SignUpSerializer,
-                             TitlesPostSerializer, TitlesSerializer,
-                             TokenSerializer, UserSerializer)
-from reviews.models import Category, Genres, Review, Title
+                             TitleDetailSerializer, TitlesPostSerializer,
+                             TitlesSerializer, TokenSerializer,
+                             TopTitlesQuerySerializer, UserSerializer)
+from reviews.models import (Category, Comment, Genres, GenreTitle,
+                            RatingPrior, Review, SimilarTitle, Title)
+from reviews.counters import TITLES, get_counter
+from reviews.ratings import title_score_stats, top_titles
 from users.models import User
 
 
+# От этих моделей зависят ответы со списком и карточкой произведения.
+# Comment - из-за счётчика комментариев, он меняется без сохранения Title.
+TITLE_CACHE_MODELS = (
+    Title, GenreTitle, Genres, Category, Review, Comment, RatingPrior
+)
+SIMILAR_CACHE_MODELS = (*TITLE_CACHE_MODELS, SimilarTitle)
+SCORE_STATS_CACHE_MODELS = (Title, Review, RatingPrior)
+# ETag карточки, отзывов и комментариев строится по ревизии произведения
+# или отзыва: её поднимают те же UPDATE, что меняют счётчики. От моделей
+# остаётся только имя автора.
+AUTHOR_CACHE_MODELS = (User,)
+
+
+def title_revision(view):
+    return view.get_detail()[1]['revision']
+
+
+def title_detail_models(view):
+    # Только карточка с ?expand= включает отзывы и комментарии с авторами.
+    return AUTHOR_CACHE_MODELS if view.get_expand() else ()
+
+
+def route_revision(view):
+    return view.get_route()['revision']
+
+
 class CreateListDestroy(mixins.CreateModelMixin,
                         mixins.ListModelMixin,
                         mixins.DestroyModelMixin,
@@ -32,6 +75,129 @@ class CreateListDestroy(mixins.CreateModelMixin,
     pass
 
 
+def with_author_username(queryset):
+    """Автор объекта тем же запросом, из его строки - только username."""
+    fields = [field.name for field in queryset.model._meta.concrete_fields]
+    return queryset.select_related('author').only(
+        *fields, 'author__username'
+    )
+
+
+class SparseFieldsMixin:
+    """Оставляет в ответе поля из `?fields=` или все, кроме `?omit=`.
+
+    Вьюсет может облегчить запрос под выбранные поля, проверяя
+    `get_sparse_fields()`, как это делает FastReadMixin.
+    """
+    sparse_actions = ('list', 'retrieve', 'similar')
+    fields_query_param = 'fields'
+    omit_query_param = 'omit'
+
+    def _split_param(self, name):
+        value = self.request.query_params.get(name, '')
+        return {field for field in value.split(',') if field}
+
+    def get_sparse_fields(self):
+        """Набор полей ответа или None, если ответ полный."""
+        if self.action not in self.sparse_actions:
+            return None
+        if not hasattr(self, '_sparse_fields'):
+            self._sparse_fields = None
+            fields = self._split_param(self.fields_query_param)
+            omit = self._split_param(self.omit_query_param)
+            if fields or omit:
+                available = self.get_serializer_class()(
+                    context=self.get_serializer_context()
+                ).fields.keys()
+                for name, requested in (
+                    (self.fields_query_param, fields),
+                    (self.omit_query_param, omit),
+                ):
+                    unknown = requested - set(available)
+                    if unknown:
+                        raise ValidationError({name: [
+                            'Неизвестные поля: '
+                            + ', '.join(sorted(unknown))
+                        ]})
+                self._sparse_fields = {
+                    field for field in available
+                    if (not fields or field in fields) and field not in omit
+                }
+        return self._sparse_fields
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            target = getattr(serializer, 'child', serializer)
+            for name in list(target.fields):
+                if name not in fields:
+                    target.fields.pop(name)
+        return serializer
+
+
+class FastReadMixin:
+    """list и retrieve через `reader_class` вместо сериализаторов DRF.
+
+    Учитывает `?fields=`/`?omit=` из SparseFieldsMixin.
+    """
+    reader_class = None
+
+    def get_reader_class(self):
+        return self.reader_class
+
+    def get_reader(self):
+        return self.get_reader_class()(fields=self.get_sparse_fields())
+
+    def read_list(self):
+        reader = self.get_reader()
+        queryset = self.filter_queryset(self.get_queryset())
+        # Ключ курсора должен быть в строках для ссылок на страницы.
+        ordering = getattr(self.paginator, 'ordering', ())
+        rows = reader.prepare(
+            queryset, extra=[name.lstrip('-') for name in ordering]
+        )
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(reader.render(page))
+        return Response(reader.render(rows))
+
+    def get_row(self, reader, extra=()):
+        """Строка объекта из URL, как get_object(), но через values().
+
+        Права проверяются на экземпляре модели из столбцов строки.
+        Внешние ключи (`author_id` и т.п.) выбираются всегда, поэтому
+        правам доступны связи вроде `obj.author`; остальные поля
+        отложены и догружаются при обращении.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        opts = queryset.model._meta
+        foreign_keys = [
+            field.attname for field in opts.concrete_fields
+            if field.is_relation
+        ]
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(
+            reader.prepare(queryset, extra=(*extra, *foreign_keys)),
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        values = {**row, opts.pk.attname: row['pk']}
+        # from_db ждёт значения в порядке concrete_fields.
+        fields = [
+            field.attname for field in opts.concrete_fields
+            if field.attname in values
+        ]
+        instance = queryset.model.from_db(
+            queryset.db, fields, [values[name] for name in fields]
+        )
+        self.check_object_permissions(self.request, instance)
+        return row
+
+    def read_detail(self):
+        reader = self.get_reader()
+        return Response(reader.render([self.get_row(reader)])[0])
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def signup(request):
@@ -84,13 +250,19 @@ def token(request):
         )
 
 
+@api_view(['GET'])
+@permission_classes([IsAdminOrAuthor])
+def cache_stats(request):
+    return Response(get_stats(), status=status.HTTP_200_OK)
+
+
 class UserViewSet(viewsets.ModelViewSet):
     http_method_names = ['get', 'post', 'delete', 'patch']
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = (IsAdminOrAuthor, )
-    filter_backends = (filters.SearchFilter,)
-    search_fields = ('username',)
+    filter_backends = (NormalizedSearchFilter,)
+    search_fields = ('^username_search',)
     lookup_field = 'username'
 
     @action(
@@ -114,91 +286,340 @@ class UserViewSet(viewsets.ModelViewSet):
             serializer.save()
             return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @action(
+        detail=False,
+        url_path='me/recommendations',
+        permission_classes=(IsAuthenticated, )
+    )
+    def recommendations(self, request):
+        # Ответ свой у каждого пользователя, поэтому не кешируется.
+        reader = TitleReader()
+        rows = list(reader.prepare(
+            Title.objects.filter(recommended_to__user=request.user).exclude(
+                reviews__author=request.user
+            ).order_by('recommended_to__rank'),
+            extra=('recommended_to__score',),
+        ))
+        data = reader.render(rows)
+        for row, item in zip(rows, data):
+            item['predicted_score'] = row['recommended_to__score']
+        return Response(data)
 
-class TitlesViewSet(viewsets.ModelViewSet):
+
+class TitlesViewSet(SparseFieldsMixin, FastReadMixin,
+                    viewsets.ModelViewSet):
     http_method_names = ['get', 'post', 'delete', 'patch']
-    queryset = Title.objects.all().annotate(rating=Avg('reviews__score'))
+    queryset = Title.objects.select_related(
+        'category'
+    ).prefetch_related(GENRE_PREFETCH)
     serializer_class = TitlesSerializer
-    pagination_class = LimitOffsetPagination
-    filter_backends = (DjangoFilterBackend, filters.SearchFilter,)
+    reader_class = TitleReader
+    pagination_class = TitlePagination
+    filter_backends = (
+        DjangoFilterBackend, TitleSearchFilter, filters.OrderingFilter
+    )
+    ordering_fields = (
+        'id', 'name', 'year', 'rating', 'weighted_rating', 'reviews_count',
+        'comments_count',
+    )
     filterset_class = GenreFilter
-    search_fields = ('category__slug', 'genre__slug', 'name', 'year',)
+    search_fields = ('category__slug', 'genre__slug', 'name_search', 'year',)
     permission_classes = [AdminOrReadOnly]
+    facets_max_age = 60
+    bulk_max_items = 10000
+    expand_query_param = 'expand'
+    expand_choices = ('reviews', 'reviews.comments')
+    expand_reviews_limit = 5
+    expand_comments_limit = 3
+
+    def get_reader_class(self):
+        if self.action == 'retrieve':
+            return TitleDetailReader
+        return TitleReader
+
+    def get_total_count(self):
+        return get_counter(TITLES)
 
     def get_serializer_class(self):
-        if self.action in ('list', 'retrieve'):
+        if self.action == 'retrieve':
+            return TitleDetailSerializer
+        if self.action in ('list', 'top', 'similar'):
             return TitlesSerializer
         return TitlesPostSerializer
 
+    @etag_response(*TITLE_CACHE_MODELS)
+    @cache_response(*TITLE_CACHE_MODELS)
+    def list(self, request, *args, **kwargs):
+        return self.read_list()
+
+    @etag_response(revision=title_revision, depends=title_detail_models)
+    @cache_response(*TITLE_CACHE_MODELS, depends=title_detail_models)
+    def retrieve(self, request, *args, **kwargs):
+        expand = self.get_expand()
+        reader, row = self.get_detail()
+        data = reader.render([row])[0]
+        if not expand:
+            return Response(data)
+        data['reviews'] = read_title_reviews(
+            row['pk'], row['reviews_count'], self.expand_reviews_limit,
+            comments_limit=(
+                self.expand_comments_limit
+                if 'reviews.comments' in expand else None
+            ),
+        )
+        return Response(data)
+
+    def get_detail(self):
+        """Читатель и строка карточки.
+
+        Строка читается один раз: по её ревизии ETag отвечает 304, а
+        при 200 из неё же строится ответ.
+        """
+        if not hasattr(self, '_detail'):
+            reader = self.get_reader()
+            self._detail = reader, self.get_row(
+                reader, extra=('reviews_count', 'revision')
+            )
+        return self._detail
+
+    def get_expand(self):
+        """Связи из `?expand=`: первые отзывы и их первые комментарии."""
+        value = self.request.query_params.get(self.expand_query_param, '')
+        expand = {name for name in value.split(',') if name}
+        unknown = expand - set(self.expand_choices)
+        if unknown:
+            raise ValidationError({self.expand_query_param: [
+                'Неизвестные связи: ' + ', '.join(sorted(unknown))
+            ]})
+        return expand
+
+    @action(detail=False, url_path='top')
+    @etag_response(*TITLE_CACHE_MODELS)
+    @cache_response(*TITLE_CACHE_MODELS)
+    def top(self, request):
+        query = TopTitlesQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        titles = top_titles(self.get_queryset(), **query.validated_data)
+        serializer = self.get_serializer(titles, many=True)
+        return Response(serializer.data)
+
+    @action(detail=False, url_path='autocomplete')
+    def autocomplete(self, request):
+        # Индекс сам следит за версией произведений, кеш ответов не нужен.
+        query = AutocompleteQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        return Response(autocomplete_titles(
+            query.validated_data['q'], query.validated_data['limit']
+        ))
+
+    @action(detail=True, url_path='similar')
+    @etag_response(*SIMILAR_CACHE_MODELS)
+    @cache_response(*SIMILAR_CACHE_MODELS)
+    def similar(self, request, pk=None):
+        reader = TitleReader(fields=self.get_sparse_fields())
+        rows = list(reader.prepare(
+            Title.objects.filter(similar_to__title_id=pk).order_by(
+                'similar_to__rank'
+            ),
+            extra=('similar_to__score',),
+        ))
+        if not rows:
+            get_object_or_404(Title, pk=pk)
+        data = reader.render(rows)
+        for row, item in zip(rows, data):
+            item['similarity'] = row['similar_to__score']
+        return Response(data)
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request):
+        items = request.data
+        if not isinstance(items, list):
+            return Response(
+                {'non_field_errors': ['Ожидается список произведений.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(items) > self.bulk_max_items:
+            return Response(
+                {'non_field_errors': [
+                    f'За один запрос можно загрузить не больше '
+                    f'{self.bulk_max_items} произведений.'
+                ]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        created, errors = bulk_create_titles(items)
+        return Response(
+            {
+                'created': [
+                    {'index': index, 'id': title.pk}
+                    for index, title in created
+                ],
+                'errors': [
+                    {'index': index, 'errors': item_errors}
+                    for index, item_errors in errors.items()
+                ],
+            },
+            status=(
+                status.HTTP_400_BAD_REQUEST if errors and not created
+                else status.HTTP_201_CREATED
+            )
+        )
+
+    @action(detail=False, url_path='facets')
+    @cache_response(*TITLE_CACHE_MODELS)
+    def facets(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        response = Response(get_title_facets(queryset))
+        # Ответ зависит только от строки запроса.
+        patch_cache_control(
+            response, public=True, max_age=self.facets_max_age
+        )
+        return response
+
 
 class CategoriesViewSet(CreateListDestroy):
     queryset = Category.objects.all()
     serializer_class = CategoriesSerializer
     pagination_class = LimitOffsetPagination
     lookup_field = 'slug'
-    filter_backends = (filters.SearchFilter,)
-    search_fields = ('name',)
+    filter_backends = (NormalizedSearchFilter,)
+    search_fields = ('^name_search',)
     permission_classes = [AdminOrReadOnly]
 
+    @cache_response(Category)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
 
 class GenresViewSet(CreateListDestroy):
     queryset = Genres.objects.all()
     serializer_class = GenresSerializer
     pagination_class = LimitOffsetPagination
     lookup_field = 'slug'
-    filter_backends = (filters.SearchFilter,)
-    search_fields = ('name',)
+    filter_backends = (NormalizedSearchFilter,)
+    search_fields = ('^name_search',)
     permission_classes = [AdminOrReadOnly]
 
+    @cache_response(Genres)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+
+class NestedRouteMixin:
+    """Родительские объекты вложенного URL, прочитанные одним запросом.
+
+    `route_lookups` сопоставляет поля `route_model` с параметрами URL,
+    поэтому путь с чужим родителем (отзыв другого произведения) даёт
+    404. Строка со столбцами `route_fields` запоминается на вьюсете и
+    служит и фильтру списка, и созданию объекта, и счётчику страниц.
+    """
+    route_model = None
+    route_lookups = {}
+    route_fields = ()
 
-class ReviewViewSet(viewsets.ModelViewSet):
+    def get_route(self):
+        if not hasattr(self, '_route'):
+            self._route = get_object_or_404(
+                self.route_model.objects.values('pk', *self.route_fields),
+                **{
+                    field: self.kwargs[kwarg]
+                    for field, kwarg in self.route_lookups.items()
+                }
+            )
+        return self._route
+
+
+class ReviewViewSet(NestedRouteMixin, SparseFieldsMixin, FastReadMixin,
+                    viewsets.ModelViewSet):
     """Вьюсет для отзывов."""
     http_method_names = ['get', 'post', 'delete', 'patch']
     serializer_class = ReviewSerializer
     permission_classes = (IsAdminOrAuthorOrModerator,)
-    pagination_class = LimitOffsetPagination
+    pagination_class = ReviewPagination
+    reader_class = ReviewReader
+    filter_backends = (filters.OrderingFilter,)
+    ordering_fields = ('pub_date', 'score', 'comments_count')
     lookup_url_kwarg = 'review_id'
+    route_model = Title
+    route_lookups = {'pk': 'title_id'}
+    route_fields = ('reviews_count', 'revision')
+    duplicate_review_message = 'Вы уже оставили отзыв к этому произведению.'
 
-    def get_queryset(self):
-        title_id = self.kwargs.get('title_id')
-        reviews_id = self.kwargs.get('review_id')
-        title = get_object_or_404(Title, id=title_id)
+    @etag_response(*AUTHOR_CACHE_MODELS, revision=route_revision)
+    def list(self, request, *args, **kwargs):
+        return self.read_list()
 
-        if not reviews_id:
-            return title.reviews.all()
-        return title.reviews.filter(id=reviews_id)
+    @etag_response(*AUTHOR_CACHE_MODELS, revision=route_revision)
+    def retrieve(self, request, *args, **kwargs):
+        return self.read_detail()
 
-    def perform_create(self, serializer):
-        title_id = self.kwargs.get('title_id')
-        serializer.save(
-            author=self.request.user,
-            title=get_object_or_404(Title, id=title_id),
+    @action(detail=False, url_path='stats')
+    @etag_response(*SCORE_STATS_CACHE_MODELS)
+    @cache_response(*SCORE_STATS_CACHE_MODELS)
+    def stats(self, request, title_id=None):
+        stats = title_score_stats(title_id)
+        if stats is None:
+            raise Http404
+        return Response(stats)
+
+    def get_total_count(self):
+        return self.get_route()['reviews_count']
+
+    def get_queryset(self):
+        return with_author_username(
+            Review.objects.filter(title_id=self.get_route()['pk'])
         )
 
+    def perform_create(self, serializer):
+        title_id = self.get_route()['pk']
+        # Повторный отзыв отсекает ограничение 'unique review': проверка
+        # перед вставкой стоила бы запроса и не спасала от гонки.
+        try:
+            serializer.save(author=self.request.user, title_id=title_id)
+        except IntegrityError:
+            if not Review.objects.filter(
+                author=self.request.user, title_id=title_id
+            ).exists():
+                raise
+            raise ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    self.duplicate_review_message
+                ]
+            })
+
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(NestedRouteMixin, SparseFieldsMixin, FastReadMixin,
+                     viewsets.ModelViewSet):
     """Вьюсет для комментариев."""
     http_method_names = ['get', 'post', 'delete', 'patch']
     serializer_class = CommentSerializer
     permission_classes = (IsAdminOrAuthorOrModerator,)
-    pagination_class = LimitOffsetPagination
+    pagination_class = CommentPagination
+    reader_class = CommentReader
     lookup_url_kwarg = 'comment_id'
+    route_model = Review
+    route_lookups = {'pk': 'review_id', 'title_id': 'title_id'}
+    route_fields = ('title_id', 'comments_count', 'revision')
 
-    def get_queryset(self):
-        reviews_id = self.kwargs.get('review_id')
-        comment_id = self.kwargs.get('comment_id')
-        review = get_object_or_404(Review, id=reviews_id)
+    @etag_response(*AUTHOR_CACHE_MODELS, revision=route_revision)
+    def list(self, request, *args, **kwargs):
+        return self.read_list()
 
-        if not comment_id:
-            return review.comments.all()
-        return review.comments.filter(id=comment_id)
+    @etag_response(*AUTHOR_CACHE_MODELS, revision=route_revision)
+    def retrieve(self, request, *args, **kwargs):
+        return self.read_detail()
 
-    def perform_create(self, serializer):
-        title_id = self.kwargs.get('title_id')
-        reviews_id = self.kwargs.get('review_id')
+    def get_total_count(self):
+        return self.get_route()['comments_count']
 
+    def get_queryset(self):
+        return with_author_username(
+            Comment.objects.filter(review_id=self.get_route()['pk'])
+        )
+
+    def perform_create(self, serializer):
+        route = self.get_route()
         serializer.save(
             author=self.request.user,
-            title=get_object_or_404(Title, id=title_id),
-            review=get_object_or_404(Review, id=reviews_id),
+            title_id=route['title_id'],
+            review_id=route['pk'],
         )
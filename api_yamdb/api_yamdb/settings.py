@@ -68,10 +68,49 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Файл, а не общая память: параллельные записи в тестах ждут
+        # блокировку, а не падают с 'database table is locked'.
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
 
+# Cache
+
+RESPONSE_CACHE_ALIAS = 'responses'
+
+# Версии моделей для ключей и ETag живут в кеше ответов, поэтому он
+# должен быть общим для всех процессов, которые обслуживают API:
+# locmem - только для одного процесса (runserver, один воркер), file -
+# для воркеров на одной машине, redis - для нескольких машин.
+RESPONSE_CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'yamdb-responses',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'redis': {
+        'BACKEND': 'api.cache_backends.RedisCache',
+        'LOCATION': os.getenv('REDIS_URL', 'redis://127.0.0.1:6379/1'),
+        'KEY_PREFIX': 'yamdb',
+    },
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    RESPONSE_CACHE_ALIAS: {
+        **RESPONSE_CACHE_BACKENDS[os.getenv('RESPONSE_CACHE', 'file')],
+        'TIMEOUT': 300,
+    },
+}
+
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -14,3 +14,14 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
 
 application = get_wsgi_application()
+
+# Индекс подсказок строим при запуске, а не на первом запросе.
+from django.db import DatabaseError  # noqa: E402
+
+from api.autocomplete import rebuild_index  # noqa: E402
+
+try:
+    rebuild_index()
+except DatabaseError:
+    # Таблиц ещё нет (миграции не применены): соберётся по запросу.
+    pass
@@ -1,14 +1,21 @@
 from django.contrib import admin
 
-from .models import Category, Comment, Genres, Review, Title
+from .models import Category, Comment, Genres, RatingPrior, Review, Title
 
 
 class ReviewAdmin(admin.ModelAdmin):
     list_display = ('text', 'author', 'title', 'score')
+    readonly_fields = Review.aggregate_fields
+
+
+class TitleAdmin(admin.ModelAdmin):
+    list_display = ('name', 'year', 'category', 'rating')
+    readonly_fields = Title.aggregate_fields
 
 
 admin.site.register(Review, ReviewAdmin)
 admin.site.register(Comment)
-admin.site.register(Title)
+admin.site.register(Title, TitleAdmin)
 admin.site.register(Category)
 admin.site.register(Genres)
+admin.site.register(RatingPrior)
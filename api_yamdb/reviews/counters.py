@@ -0,0 +1,85 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from reviews.models import Comment, Counter, Review, Title
+
+TITLES = 'titles'
+
+# Как посчитать каждый счётчик заново.
+COUNTERS = {
+    TITLES: lambda: Title.objects.count(),
+}
+
+
+def _reset_counter(name):
+    value = COUNTERS[name]()
+    Counter.objects.update_or_create(name=name, defaults={'value': value})
+    return value
+
+
+def change_counter(name, delta):
+    """Атомарно сдвигает счётчик, заводя его при первом обращении."""
+    if not Counter.objects.filter(name=name).update(value=F('value') + delta):
+        _reset_counter(name)
+
+
+def get_counter(name):
+    value = Counter.objects.filter(name=name).values_list(
+        'value', flat=True
+    ).first()
+    if value is None:
+        value = _reset_counter(name)
+    return value
+
+
+def next_revision():
+    """Значение для UPDATE, которое сдвигает ревизию объекта."""
+    return F('revision') + 1
+
+
+def bump_revision(model, *pks):
+    """Сдвигает ревизию объектов, изменившихся без счётчиков."""
+    model.objects.filter(pk__in=pks).update(revision=next_revision())
+
+
+def change_reviews_count(title_id, delta):
+    Title.objects.filter(pk=title_id).update(
+        reviews_count=F('reviews_count') + delta,
+        revision=next_revision(),
+    )
+
+
+def change_comments_count(review_id, title_id, delta):
+    Review.objects.filter(pk=review_id).update(
+        comments_count=F('comments_count') + delta,
+        revision=next_revision(),
+    )
+    Title.objects.filter(pk=title_id).update(
+        comments_count=F('comments_count') + delta,
+        revision=next_revision(),
+    )
+
+
+def _count_subquery(model, field):
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(value=Count('pk'))
+        .values('value')
+    ), 0)
+
+
+def rebuild_counters():
+    """Пересчитывает все счётчики по фактическим строкам."""
+    for name in COUNTERS:
+        _reset_counter(name)
+    Title.objects.update(
+        reviews_count=_count_subquery(Review, 'title'),
+        comments_count=_count_subquery(Comment, 'title'),
+        revision=next_revision(),
+    )
+    Review.objects.update(
+        comments_count=_count_subquery(Comment, 'review'),
+        revision=next_revision(),
+    )
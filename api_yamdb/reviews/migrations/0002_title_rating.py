@@ -0,0 +1,63 @@
+# Generated by Django 3.2 on 2026-10-18 16:34
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def fill_ratings(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+
+    def scores(aggregate):
+        return Subquery(
+            Review.objects.filter(title=OuterRef('pk'), score__isnull=False)
+            .order_by()
+            .values('title')
+            .annotate(value=aggregate)
+            .values('value')
+        )
+
+    Title.objects.update(
+        rating_sum=Coalesce(scores(Sum('score')), 0),
+        rating_count=Coalesce(scores(Count('score')), 0),
+        rating=scores(Avg('score')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='comment',
+            options={'verbose_name': 'Комментарий', 'verbose_name_plural': 'Комментарии'},
+        ),
+        migrations.AlterModelOptions(
+            name='review',
+            options={'ordering': ['-pub_date'], 'verbose_name': 'Оценка', 'verbose_name_plural': 'Оценки'},
+        ),
+        migrations.AlterModelOptions(
+            name='title',
+            options={'verbose_name': 'Название', 'verbose_name_plural': 'Названия'},
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='rating',
+            field=models.FloatField(blank=True, null=True, verbose_name='Рейтинг'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Количество оценок'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, verbose_name='Сумма оценок'),
+        ),
+        migrations.RunPython(fill_ratings, migrations.RunPython.noop),
+    ]
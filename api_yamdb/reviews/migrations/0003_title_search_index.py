@@ -0,0 +1,50 @@
+from django.db import migrations
+
+CREATE_SQL = '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS reviews_title_fts USING fts5(
+        name, description, year, category, genres,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+'''
+
+FILL_SQL = '''
+    INSERT INTO reviews_title_fts (rowid, name, description, year, category,
+                                   genres)
+    SELECT title.id, title.name, COALESCE(title.description, ''),
+           title.year,
+           COALESCE(category.name || ' ' || category.slug, ''),
+           COALESCE((
+               SELECT group_concat(genre.name || ' ' || genre.slug, ' ')
+               FROM reviews_genretitle AS genre_title
+               INNER JOIN reviews_genres AS genre
+                   ON genre.id = genre_title.genre_id
+               WHERE genre_title.title_id = title.id
+           ), '')
+    FROM reviews_title AS title
+    LEFT OUTER JOIN reviews_category AS category
+        ON category.id = title.category_id
+'''
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(CREATE_SQL)
+    schema_editor.execute(FILL_SQL)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute('DROP TABLE IF EXISTS reviews_title_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0002_title_rating'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 3.2 on 2026-10-18 16:45
+
+import api.fields
+from django.db import migrations
+
+
+def fill_name_search(apps, schema_editor):
+    for model_name in ('Category', 'Genres', 'Title'):
+        model = apps.get_model('reviews', model_name)
+        objs = list(model.objects.only('pk', 'name'))
+        for obj in objs:
+            obj.name_search = api.fields.normalize_search(obj.name)
+        model.objects.bulk_update(objs, ['name_search'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_title_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='name_search',
+            field=api.fields.NormalizedCharField(db_index=True, default='', editable=False, max_length=256, source='name'),
+        ),
+        migrations.AddField(
+            model_name='genres',
+            name='name_search',
+            field=api.fields.NormalizedCharField(db_index=True, default='', editable=False, max_length=256, source='name'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='name_search',
+            field=api.fields.NormalizedCharField(db_index=True, default='', editable=False, max_length=256, source='name'),
+        ),
+        migrations.RunPython(fill_name_search, migrations.RunPython.noop),
+    ]
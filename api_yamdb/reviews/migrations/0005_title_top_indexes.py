@@ -0,0 +1,40 @@
+# Generated by Django 3.2 on 2026-10-18 16:52
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fill_genre_ratings(apps, schema_editor):
+    GenreTitle = apps.get_model('reviews', 'GenreTitle')
+    Title = apps.get_model('reviews', 'Title')
+    GenreTitle.objects.update(rating=Subquery(
+        Title.objects.filter(pk=OuterRef('title_id')).values('rating')
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_name_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='genretitle',
+            name='rating',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Рейтинг произведения'),
+        ),
+        migrations.RunPython(fill_genre_ratings, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='genretitle',
+            index=models.Index(fields=['genre', '-rating', 'title'], name='genretitle_top_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['-rating', 'id'], name='title_top_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['category', '-rating', 'id'], name='title_category_top_idx'),
+        ),
+    ]
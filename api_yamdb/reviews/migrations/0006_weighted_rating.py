@@ -0,0 +1,56 @@
+# Generated by Django 3.2 on 2026-10-18 16:54
+
+from django.db import migrations, models
+from django.db.models import Avg, Case, F, FloatField, Value, When
+from django.db.models.functions import Cast
+
+
+def fill_weighted_ratings(apps, schema_editor):
+    RatingPrior = apps.get_model('reviews', 'RatingPrior')
+    Review = apps.get_model('reviews', 'Review')
+    Title = apps.get_model('reviews', 'Title')
+    mean = Review.objects.aggregate(mean=Avg('score'))['mean']
+    prior = RatingPrior.objects.create(pk=1, **(
+        {'mean': mean} if mean is not None else {}
+    ))
+    Title.objects.update(weighted_rating=Case(
+        When(rating_count__gt=0, then=(
+            (Cast(F('rating_sum'), FloatField())
+             + prior.mean * prior.min_votes)
+            / (F('rating_count') + prior.min_votes)
+        )),
+        default=Value(None),
+        output_field=FloatField(),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_title_top_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RatingPrior',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mean', models.FloatField(default=5.5, verbose_name='Средняя оценка по каталогу')),
+                ('min_votes', models.PositiveIntegerField(default=10, verbose_name='Минимум оценок')),
+            ],
+            options={
+                'verbose_name': 'параметры рейтинга',
+                'verbose_name_plural': 'Параметры рейтинга',
+            },
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='weighted_rating',
+            field=models.FloatField(blank=True, null=True, verbose_name='Взвешенный рейтинг'),
+        ),
+        migrations.RunPython(fill_weighted_ratings, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['-weighted_rating', 'id'], name='title_weighted_idx'),
+        ),
+    ]
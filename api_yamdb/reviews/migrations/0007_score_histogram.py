@@ -0,0 +1,84 @@
+# Generated by Django 3.2 on 2026-10-18 16:56
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_histograms(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+
+    def count(score):
+        return Coalesce(Subquery(
+            Review.objects.filter(title=OuterRef('pk'), score=score)
+            .order_by()
+            .values('title')
+            .annotate(value=Count('pk'))
+            .values('value')
+        ), 0)
+
+    Title.objects.update(**{
+        f'score_{score}': count(score) for score in range(1, 11)
+    })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_weighted_rating'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='score_1',
+            field=models.PositiveIntegerField(default=0, verbose_name='Оценок «1»'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_10',
+            field=models.PositiveIntegerField(default=0, verbose_name='Оценок «10»'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_2',
+            field=models.PositiveIntegerField(default=0, verbose_name='Оценок «2»'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_3',
+            field=models.PositiveIntegerField(default=0, verbose_name='Оценок «3»'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_4',
+            field=models.PositiveIntegerField(default=0, verbose_name='Оценок «4»'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_5',
+            field=models.PositiveIntegerField(default=0, verbose_name='Оценок «5»'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_6',
+            field=models.PositiveIntegerField(default=0, verbose_name='Оценок «6»'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_7',
+            field=models.PositiveIntegerField(default=0, verbose_name='Оценок «7»'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_8',
+            field=models.PositiveIntegerField(default=0, verbose_name='Оценок «8»'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_9',
+            field=models.PositiveIntegerField(default=0, verbose_name='Оценок «9»'),
+        ),
+        migrations.RunPython(fill_histograms, migrations.RunPython.noop),
+    ]
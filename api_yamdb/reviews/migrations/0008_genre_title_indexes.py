@@ -0,0 +1,31 @@
+# Generated by Django 3.2 on 2026-10-18 17:05
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def remove_duplicate_links(apps, schema_editor):
+    GenreTitle = apps.get_model('reviews', 'GenreTitle')
+    keep = GenreTitle.objects.values('title', 'genre').annotate(
+        first=Min('pk')
+    ).values('first')
+    GenreTitle.objects.exclude(pk__in=keep).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_score_histogram'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='genretitle',
+            index=models.Index(fields=['genre', 'title'], name='genretitle_genre_title_idx'),
+        ),
+        migrations.RunPython(remove_duplicate_links, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='genretitle',
+            constraint=models.UniqueConstraint(fields=('title', 'genre'), name='unique genre title'),
+        ),
+    ]
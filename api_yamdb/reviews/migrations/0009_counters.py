@@ -0,0 +1,57 @@
+# Generated by Django 3.2 on 2026-10-18 17:08
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    Counter = apps.get_model('reviews', 'Counter')
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    Comment = apps.get_model('reviews', 'Comment')
+
+    def count(model, field):
+        return Coalesce(Subquery(
+            model.objects.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(value=Count('pk'))
+            .values('value')
+        ), 0)
+
+    Counter.objects.create(name='titles', value=Title.objects.count())
+    Title.objects.update(reviews_count=count(Review, 'title'))
+    Review.objects.update(comments_count=count(Comment, 'review'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_genre_title_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Counter',
+            fields=[
+                ('name', models.SlugField(primary_key=True, serialize=False, verbose_name='Название')),
+                ('value', models.BigIntegerField(default=0, verbose_name='Значение')),
+            ],
+            options={
+                'verbose_name': 'счётчик',
+                'verbose_name_plural': 'Счётчики',
+            },
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Количество комментариев'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='reviews_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Количество отзывов'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 3.2 on 2026-10-18 17:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarTitle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='Место')),
+                ('score', models.FloatField(verbose_name='Сходство')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_to', to='reviews.title')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_titles', to='reviews.title')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='similartitle',
+            index=models.Index(fields=['title', 'rank'], name='similartitle_rank_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='similartitle',
+            constraint=models.UniqueConstraint(fields=('title', 'similar'), name='unique similar title'),
+        ),
+    ]
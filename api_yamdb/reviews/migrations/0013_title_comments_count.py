@@ -0,0 +1,41 @@
+# Generated by Django 3.2 on 2026-10-18 17:27
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_comments_count(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Comment = apps.get_model('reviews', 'Comment')
+    Title.objects.update(comments_count=Coalesce(Subquery(
+        Comment.objects.filter(title=OuterRef('pk'))
+        .order_by()
+        .values('title')
+        .annotate(value=Count('pk'))
+        .values('value')
+    ), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0012_review_comment_date_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Количество комментариев'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['-reviews_count', 'id'], name='title_reviews_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['-comments_count', 'id'], name='title_comments_count_idx'),
+        ),
+        migrations.RunPython(fill_comments_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2 on 2026-10-18 18:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0013_title_comments_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='revision',
+            field=models.PositiveBigIntegerField(default=0, verbose_name='Ревизия'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='revision',
+            field=models.PositiveBigIntegerField(default=0, verbose_name='Ревизия'),
+        ),
+    ]
@@ -1,12 +1,49 @@
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
 
 from users.models import User
+from api.fields import NormalizedCharField
 from api.validators import chek_year
 
 
+# Допустимые оценки отзыва.
+SCORES = range(1, 11)
+
+
+class AggregatesModel(models.Model):
+    """Модель с агрегатами, которые меняются только атомарными UPDATE."""
+    aggregate_fields = ()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # Не перезаписываем агрегаты устаревшими значениями экземпляра.
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.aggregate_fields
+            ]
+        super().save(*args, **kwargs)
+
+
+class Counter(models.Model):
+    """Размер коллекции, который поддерживают сигналы вместо COUNT(*)."""
+    name = models.SlugField('Название', primary_key=True)
+    value = models.BigIntegerField('Значение', default=0)
+
+    class Meta:
+        verbose_name = 'счётчик'
+        verbose_name_plural = 'Счётчики'
+
+    def __str__(self):
+        return f'{self.name}: {self.value}'
+
+
 class Category(models.Model):
     name = models.CharField('Наименование', max_length=256)
+    name_search = NormalizedCharField(max_length=256, source='name')
     slug = models.SlugField('Индентификатор', max_length=50, unique=True)
 
     class Meta:
@@ -19,6 +56,7 @@ class Category(models.Model):
 
 class Genres(models.Model):
     name = models.CharField('Наименование', max_length=256)
+    name_search = NormalizedCharField(max_length=256, source='name')
     slug = models.SlugField('Индентификатор', max_length=50, unique=True)
 
     class Meta:
@@ -29,8 +67,27 @@ class Genres(models.Model):
         return self.name
 
 
-class Title(models.Model):
+class RatingPrior(models.Model):
+    """Априорные параметры взвешенного рейтинга, одна запись."""
+    mean = models.FloatField('Средняя оценка по каталогу', default=5.5)
+    min_votes = models.PositiveIntegerField('Минимум оценок', default=10)
+
+    class Meta:
+        verbose_name = 'параметры рейтинга'
+        verbose_name_plural = 'Параметры рейтинга'
+
+    def __str__(self):
+        return f'{self.mean} / {self.min_votes}'
+
+    @classmethod
+    def get(cls):
+        prior, _ = cls.objects.get_or_create(pk=1)
+        return prior
+
+
+class Title(AggregatesModel):
     name = models.TextField('Наименование', max_length=256)
+    name_search = NormalizedCharField(max_length=256, source='name')
     year = models.IntegerField('Год выпуска', validators=(chek_year,))
     description = models.TextField('Описание', null=True)
     genre = models.ManyToManyField(
@@ -47,24 +104,173 @@ class Title(models.Model):
         null=True,
         related_name='titles',
     )
+    rating_sum = models.PositiveIntegerField('Сумма оценок', default=0)
+    rating_count = models.PositiveIntegerField(
+        'Количество оценок', default=0
+    )
+    rating = models.FloatField('Рейтинг', null=True, blank=True)
+    weighted_rating = models.FloatField(
+        'Взвешенный рейтинг', null=True, blank=True
+    )
+    reviews_count = models.PositiveIntegerField(
+        'Количество отзывов', default=0
+    )
+    comments_count = models.PositiveIntegerField(
+        'Количество комментариев', default=0
+    )
+    # Гистограмма оценок: число отзывов с каждой оценкой.
+    score_1 = models.PositiveIntegerField('Оценок «1»', default=0)
+    score_2 = models.PositiveIntegerField('Оценок «2»', default=0)
+    score_3 = models.PositiveIntegerField('Оценок «3»', default=0)
+    score_4 = models.PositiveIntegerField('Оценок «4»', default=0)
+    score_5 = models.PositiveIntegerField('Оценок «5»', default=0)
+    score_6 = models.PositiveIntegerField('Оценок «6»', default=0)
+    score_7 = models.PositiveIntegerField('Оценок «7»', default=0)
+    score_8 = models.PositiveIntegerField('Оценок «8»', default=0)
+    score_9 = models.PositiveIntegerField('Оценок «9»', default=0)
+    score_10 = models.PositiveIntegerField('Оценок «10»', default=0)
+    # Растёт при каждом изменении произведения, его отзывов
+    # и комментариев; из неё строится ETag карточки и списка отзывов.
+    revision = models.PositiveBigIntegerField('Ревизия', default=0)
+
+    score_fields = tuple(f'score_{score}' for score in SCORES)
+    # Поля, которые меняются только атомарными UPDATE из сигналов отзывов
+    # и комментариев.
+    aggregate_fields = (
+        'rating_sum', 'rating_count', 'rating', 'weighted_rating',
+        'reviews_count', 'comments_count', 'revision', *score_fields,
+    )
 
     class Meta:
         verbose_name = 'Название'
         verbose_name_plural = 'Названия'
+        indexes = [
+            models.Index(fields=['-rating', 'id'], name='title_top_idx'),
+            models.Index(
+                fields=['category', '-rating', 'id'],
+                name='title_category_top_idx',
+            ),
+            models.Index(
+                fields=['-weighted_rating', 'id'],
+                name='title_weighted_idx',
+            ),
+            models.Index(
+                fields=['-reviews_count', 'id'],
+                name='title_reviews_count_idx',
+            ),
+            models.Index(
+                fields=['-comments_count', 'id'],
+                name='title_comments_count_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Значения из БД нужны сигналам: похожие пересчитываются только
+        # при смене категории.
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Счётчик произведений меняется в сигнале сохранения.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def score_histogram(self):
+        """Число отзывов с каждой оценкой: {'1': ..., '10': ...}."""
+        return {
+            str(score): getattr(self, f'score_{score}') for score in SCORES
+        }
+
 
 class GenreTitle(models.Model):
     title = models.ForeignKey(Title, on_delete=models.CASCADE)
     genre = models.ForeignKey(Genres, on_delete=models.CASCADE)
+    # Копия Title.rating: таблица служит рейтингом произведений по жанру.
+    rating = models.FloatField(
+        'Рейтинг произведения', null=True, blank=True, editable=False
+    )
+
+    class Meta:
+        constraints = [
+            # Индекс (title, genre) обслуживает EXISTS-фильтр по жанрам.
+            models.UniqueConstraint(
+                fields=['title', 'genre'], name='unique genre title'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['genre', 'title'], name='genretitle_genre_title_idx'
+            ),
+            models.Index(
+                fields=['genre', '-rating', 'title'],
+                name='genretitle_top_idx',
+            ),
+        ]
 
     def __str__(self):
         return f'{self.title} {self.genre}'
 
 
-class Review(models.Model):
+class SimilarTitle(models.Model):
+    """Заранее посчитанные похожие произведения по жанрам и категории."""
+    title = models.ForeignKey(
+        Title, on_delete=models.CASCADE, related_name='similar_titles'
+    )
+    similar = models.ForeignKey(
+        Title, on_delete=models.CASCADE, related_name='similar_to'
+    )
+    rank = models.PositiveSmallIntegerField('Место')
+    score = models.FloatField('Сходство')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['title', 'similar'], name='unique similar title'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['title', 'rank'], name='similartitle_rank_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.title} ~ {self.similar}'
+
+
+class Recommendation(models.Model):
+    """Рекомендованные пользователю произведения с ожидаемой оценкой."""
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='recommendations'
+    )
+    title = models.ForeignKey(
+        Title, on_delete=models.CASCADE, related_name='recommended_to'
+    )
+    rank = models.PositiveSmallIntegerField('Место')
+    score = models.FloatField('Ожидаемая оценка')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'title'], name='unique recommendation'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', 'rank'], name='recommendation_rank_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user} <- {self.title}'
+
+
+class Review(AggregatesModel):
     """Модель отзыва к произведению."""
     text = models.TextField()
     author = models.ForeignKey(
@@ -74,12 +280,22 @@ class Review(models.Model):
     score = models.IntegerField(
         'Оценка',
         default=1,
-        validators=[MinValueValidator(1), MaxValueValidator(10)],
+        validators=[
+            MinValueValidator(SCORES[0]), MaxValueValidator(SCORES[-1])
+        ],
         null=True,
         blank=True,
     )
     pub_date = models.DateTimeField(
         'Дата добавления', auto_now_add=True)
+    comments_count = models.PositiveIntegerField(
+        'Количество комментариев', default=0
+    )
+    # Растёт при каждом изменении комментариев отзыва; из неё строится
+    # ETag комментариев.
+    revision = models.PositiveBigIntegerField('Ревизия', default=0)
+
+    aggregate_fields = ('comments_count', 'revision')
 
     class Meta:
         ordering = ['-pub_date']
@@ -89,12 +305,30 @@ class Review(models.Model):
                 name='unique review',
             )
         ]
+        indexes = [
+            # Отзывы произведения по дате без сортировки во временном
+            # дереве; id - rowid, он уже есть в конце индекса.
+            models.Index(
+                fields=['title', 'pub_date'], name='review_title_date_idx'
+            ),
+        ]
         verbose_name = 'Оценка'
         verbose_name_plural = 'Оценки'
 
     def __str__(self):
         return self.text[:50]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Значения из БД нужны сигналам для пересчёта рейтинга.
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     """Модель комментария к отзыву."""
@@ -111,6 +345,19 @@ class Comment(models.Model):
     def __str__(self):
         return self.text[:50]
 
+    def save(self, *args, **kwargs):
+        # Вставка и счётчики отзыва и произведения из сигнала - одна
+        # транзакция.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     class Meta:
+        ordering = ['pub_date']
+        indexes = [
+            models.Index(
+                fields=['review', 'pub_date'],
+                name='comment_review_date_idx',
+            ),
+        ]
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
@@ -0,0 +1,241 @@
+from django.db.models import (Avg, Case, Count, ExpressionWrapper, F,
+                              FloatField, OuterRef, Subquery, Sum, Value,
+                              When)
+from django.db.models.functions import Cast, Coalesce
+
+from reviews.counters import next_revision
+from reviews.models import SCORES, GenreTitle, RatingPrior, Review, Title
+
+
+def _weighted(total, count, prior_mass, prior_votes):
+    """Байесовская оценка: (сумма + m * C) / (количество + m)."""
+    return ExpressionWrapper(
+        (Cast(total, FloatField()) + prior_mass) / (count + prior_votes),
+        output_field=FloatField(),
+    )
+
+
+def _prior_subquery(expression, default):
+    # Пока запись параметров не создана, действуют значения по умолчанию.
+    return Coalesce(
+        Subquery(
+            RatingPrior.objects.filter(pk=1)
+            .annotate(value=expression)
+            .values('value')
+        ),
+        default,
+    )
+
+
+def _score_field(score):
+    return f'score_{score}'
+
+
+def _histogram_deltas(removed, added):
+    deltas = {}
+    if removed is not None:
+        deltas[_score_field(removed)] = F(_score_field(removed)) - 1
+    if added is not None:
+        deltas[_score_field(added)] = F(_score_field(added)) + 1
+    return deltas
+
+
+def update_title_rating(title_id, removed=None, added=None):
+    """Атомарно сдвигает сумму, количество и гистограмму оценок.
+
+    `removed` - оценка, которая перестала учитываться,
+    `added` - новая оценка. `None` означает отсутствие оценки.
+    """
+    sum_delta = (added or 0) - (removed or 0)
+    count_delta = (added is not None) - (removed is not None)
+    if not sum_delta and not count_delta:
+        return
+    new_sum = F('rating_sum') + sum_delta
+    new_count = F('rating_count') + count_delta
+    default = RatingPrior()
+    prior_mass = _prior_subquery(
+        ExpressionWrapper(
+            F('mean') * F('min_votes'), output_field=FloatField()
+        ),
+        default.mean * default.min_votes,
+    )
+    prior_votes = _prior_subquery(F('min_votes'), default.min_votes)
+    has_votes = {'rating_count__gt': -count_delta}
+    Title.objects.filter(pk=title_id).update(
+        revision=next_revision(),
+        rating_sum=new_sum,
+        rating_count=new_count,
+        rating=Case(
+            When(**has_votes, then=ExpressionWrapper(
+                Cast(new_sum, FloatField()) / new_count,
+                output_field=FloatField(),
+            )),
+            default=Value(None),
+            output_field=FloatField(),
+        ),
+        weighted_rating=Case(
+            When(**has_votes, then=_weighted(
+                new_sum, new_count, prior_mass, prior_votes
+            )),
+            default=Value(None),
+            output_field=FloatField(),
+        ),
+        **_histogram_deltas(removed, added),
+    )
+    sync_genre_ratings(title_ids=[title_id])
+
+
+def sync_genre_ratings(title_ids=None):
+    """Копирует рейтинг произведений в таблицу рейтингов по жанрам."""
+    links = GenreTitle.objects.all()
+    if title_ids is not None:
+        links = links.filter(title_id__in=title_ids)
+    links.update(rating=Subquery(
+        Title.objects.filter(pk=OuterRef('title_id')).values('rating')
+    ))
+
+
+def _scores_subquery(aggregate, **filters):
+    return Subquery(
+        Review.objects.filter(
+            title=OuterRef('pk'), score__isnull=False, **filters
+        )
+        .order_by()
+        .values('title')
+        .annotate(value=aggregate)
+        .values('value')
+    )
+
+
+def rebuild_title_ratings():
+    """Пересчитывает рейтинги всех произведений."""
+    updated = Title.objects.update(
+        revision=next_revision(),
+        rating_sum=Coalesce(_scores_subquery(Sum('score')), 0),
+        rating_count=Coalesce(_scores_subquery(Count('score')), 0),
+        rating=_scores_subquery(Avg('score')),
+        **{
+            _score_field(score): Coalesce(
+                _scores_subquery(Count('score'), score=score), 0
+            )
+            for score in SCORES
+        },
+    )
+    sync_genre_ratings()
+    rebuild_weighted_ratings()
+    return updated
+
+
+def rebuild_weighted_ratings(prior=None):
+    """Пересчитывает взвешенный рейтинг после смены априорных параметров."""
+    prior = prior or RatingPrior.get()
+    return Title.objects.update(
+        revision=next_revision(),
+        weighted_rating=Case(
+            When(rating_count__gt=0, then=_weighted(
+                F('rating_sum'), F('rating_count'),
+                prior.mean * prior.min_votes, prior.min_votes,
+            )),
+            default=Value(None),
+            output_field=FloatField(),
+        ),
+    )
+
+
+def _histogram(counts):
+    """Список счётчиков по всем оценкам из словаря {оценка: число}."""
+    return [counts.get(score, 0) for score in SCORES]
+
+
+def title_score_stats(title_id):
+    """Статистика оценок произведения, читается одной строкой Title."""
+    title = Title.objects.only(
+        'rating_count', 'rating', 'weighted_rating', *Title.score_fields
+    ).filter(pk=title_id).first()
+    if title is None:
+        return None
+    return {
+        'count': title.rating_count,
+        'rating': title.rating,
+        'weighted_rating': title.weighted_rating,
+        'scores': title.score_histogram(),
+    }
+
+
+def catalog_mean_score():
+    """Средняя оценка по всем отзывам каталога."""
+    return Review.objects.aggregate(mean=Avg('score'))['mean']
+
+
+def _same(value, expected):
+    if value is None or expected is None:
+        return value is expected
+    return abs(value - expected) < 1e-9
+
+
+def find_rating_mismatches():
+    """Возвращает id произведений с рассогласованным рейтингом."""
+    expected = {
+        row['title']: (row['total'], row['count'])
+        for row in Review.objects.filter(score__isnull=False)
+        .order_by()
+        .values('title')
+        .annotate(total=Sum('score'), count=Count('score'))
+    }
+    histograms = {}
+    for title_id, score, count in (
+        Review.objects.filter(score__isnull=False)
+        .order_by()
+        .values_list('title', 'score')
+        .annotate(count=Count('pk'))
+    ):
+        histograms.setdefault(title_id, {})[score] = count
+    prior = RatingPrior.get()
+    mismatches = []
+    stored = Title.objects.values_list(
+        'pk', 'rating_sum', 'rating_count', 'rating', 'weighted_rating',
+        *Title.score_fields,
+    )
+    for pk, total, count, rating, weighted, *histogram in stored.iterator():
+        expected_total, expected_count = expected.get(pk, (0, 0))
+        expected_rating = expected_weighted = None
+        if expected_count:
+            expected_rating = expected_total / expected_count
+            expected_weighted = (
+                (expected_total + prior.mean * prior.min_votes)
+                / (expected_count + prior.min_votes)
+            )
+        if (
+            (total, count) != (expected_total, expected_count)
+            or not _same(rating, expected_rating)
+            or not _same(weighted, expected_weighted)
+            or histogram != _histogram(histograms.get(pk, {}))
+        ):
+            mismatches.append(pk)
+    links = GenreTitle.objects.values_list(
+        'title_id', 'rating', 'title__rating'
+    )
+    for title_id, rating, title_rating in links.iterator():
+        if rating != title_rating and title_id not in mismatches:
+            mismatches.append(title_id)
+    return mismatches
+
+
+def top_titles(queryset, genre=None, category=None, limit=10):
+    """Лучшие по рейтингу произведения, читаются по индексам рейтинга."""
+    if genre:
+        ranks = GenreTitle.objects.filter(
+            genre__slug=genre, rating__isnull=False
+        )
+        if category:
+            ranks = ranks.filter(title__category__slug=category)
+        title_ids = list(
+            ranks.order_by('-rating', 'title_id')
+            .values_list('title_id', flat=True)[:limit]
+        )
+        titles = queryset.in_bulk(title_ids)
+        return [titles[pk] for pk in title_ids if pk in titles]
+    titles = queryset.filter(rating__isnull=False)
+    if category:
+        titles = titles.filter(category__slug=category)
+    return list(titles.order_by('-rating', 'id')[:limit])
@@ -0,0 +1,222 @@
+"""Рекомендации произведений по оценкам пользователей.
+
+Сходство произведений - косинус между их оценками, центрированными по
+средней оценке каждого пользователя. Ожидаемая оценка произведения -
+средняя оценка пользователя плюс взвешенное по сходству отклонение его
+оценок у похожих произведений.
+
+Оценки читаются из БД один раз в массивы numpy, сгруппированные по
+автору. Память задачи:
+
+* 12 байт на оценку (номер произведения int32 и отклонение float64),
+  временно ещё 8 при центрировании и 3 под маски блока;
+* 24 байта на пользователя (id, начало его оценок, средняя);
+* 12 * `neighbours` байт на произведение под соседей, плюс id, норма
+  и запись в словаре номеров при чтении;
+* блок накопителей сходства `block_size` x число произведений float64
+  и буферы пар оценок - вместе не больше `memory_mb`, если размер
+  блока не задан явно.
+"""
+from array import array
+from itertools import islice
+
+import numpy as np
+from django.db import transaction
+
+from reviews.models import Recommendation, Review
+
+TOP_K = 10
+NEIGHBOURS = 50
+CHUNK_SIZE = 10000
+BATCH_SIZE = 5000
+MEMORY_MB = 256
+# Индексы обеих оценок пары, номера их произведений и промежуточные
+# произведения отклонений.
+PAIR_BYTES = 48
+
+
+class Ratings:
+    """Центрированные оценки, сгруппированные по пользователям.
+
+    Оценки пользователя `u` лежат в `titles[offsets[u]:offsets[u + 1]]`
+    и `deviations[...]`; `titles` - номера в `title_ids`.
+    """
+
+    def __init__(self, chunk_size):
+        rows = Review.objects.filter(score__isnull=False).order_by(
+            'author_id', 'title_id'
+        ).values_list('author_id', 'title_id', 'score').iterator(
+            chunk_size=chunk_size
+        )
+        authors, offsets = array('q'), array('q')
+        titles, scores = array('i'), array('d')
+        numbers = {}
+        for author_id, title_id, score in rows:
+            if not authors or authors[-1] != author_id:
+                authors.append(author_id)
+                offsets.append(len(scores))
+            titles.append(numbers.setdefault(title_id, len(numbers)))
+            scores.append(score)
+        offsets.append(len(scores))
+
+        self.author_ids = np.frombuffer(authors, dtype=np.int64)
+        self.offsets = np.frombuffer(offsets, dtype=np.int64)
+        self.titles = np.frombuffer(titles, dtype=np.int32)
+        self.deviations = np.frombuffer(scores, dtype=np.float64)
+        self.title_ids = np.fromiter(numbers, dtype=np.int64)
+        self.means = np.zeros(len(self.author_ids))
+        if len(self.author_ids):
+            counts = np.diff(self.offsets)
+            self.means = np.add.reduceat(
+                self.deviations, self.offsets[:-1]
+            ) / counts
+            self.deviations -= np.repeat(self.means, counts)
+
+    def __len__(self):
+        return len(self.author_ids)
+
+    def user(self, index):
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return self.titles[start:end], self.deviations[start:end]
+
+    def norms(self):
+        return np.sqrt(np.bincount(
+            self.titles, weights=self.deviations ** 2,
+            minlength=len(self.title_ids),
+        ))
+
+
+def _pair_chunks(ratings, entries, pair_limit):
+    """Пары (оценка блока, любая оценка того же пользователя) пачками.
+
+    В пачке не больше `pair_limit` пар, кроме случая, когда столько
+    оценок у одного пользователя.
+    """
+    owners = np.searchsorted(ratings.offsets, entries, side='right') - 1
+    starts = ratings.offsets[owners]
+    counts = ratings.offsets[owners + 1] - starts
+    ends = np.cumsum(counts)
+    first = 0
+    while first < len(entries):
+        last = max(
+            int(np.searchsorted(
+                ends, ends[first] - counts[first] + pair_limit, side='right'
+            )),
+            first + 1,
+        )
+        chunk_counts = counts[first:last]
+        total = int(chunk_counts.sum())
+        shifts = starts[first:last] - np.cumsum(chunk_counts) + chunk_counts
+        positions = np.repeat(shifts, chunk_counts) + np.arange(total)
+        yield (
+            np.repeat(entries[first:last], chunk_counts),
+            positions,
+        )
+        first = last
+
+
+def _block_neighbours(ratings, norms, start, end, limit, pair_limit,
+                      neighbour_ids, neighbour_scores):
+    """Соседи произведений с номерами [start, end)."""
+    size = len(norms)
+    block = np.zeros((end - start, size))
+    in_block = (ratings.titles >= start) & (ratings.titles < end)
+    entries = np.flatnonzero(in_block & (ratings.deviations != 0))
+    for left, right in _pair_chunks(ratings, entries, pair_limit):
+        np.add.at(
+            block,
+            (ratings.titles[left] - start, ratings.titles[right]),
+            ratings.deviations[left] * ratings.deviations[right],
+        )
+    rows = np.arange(end - start)
+    block[rows, rows + start] = 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        block /= norms
+        block /= norms[start:end, None]
+    # Нулевые произведения при нулевой норме дали nan.
+    block[~(block > 0)] = 0
+    for row in rows:
+        values = block[row]
+        others = np.argpartition(values, size - limit)[size - limit:]
+        scores = values[others]
+        neighbour_ids[start + row] = np.where(scores > 0, others, -1)
+        neighbour_scores[start + row] = scores
+
+
+def _neighbours(ratings, limit, block_size, memory_mb):
+    size = len(ratings.title_ids)
+    limit = min(limit, size)
+    neighbour_ids = np.full((size, limit), -1, dtype=np.int32)
+    neighbour_scores = np.zeros((size, limit))
+    if not size or not limit:
+        return neighbour_ids, neighbour_scores
+    budget = memory_mb * 2 ** 20 // 2
+    if block_size is None:
+        block_size = max(budget // (8 * size), 1)
+    pair_limit = max(budget // PAIR_BYTES, 1)
+    norms = ratings.norms()
+    for start in range(0, size, block_size):
+        _block_neighbours(
+            ratings, norms, start, min(start + block_size, size), limit,
+            pair_limit, neighbour_ids, neighbour_scores,
+        )
+    return neighbour_ids, neighbour_scores
+
+
+def _predictions(ratings, user, neighbour_ids, neighbour_scores, top):
+    titles, deviations = ratings.user(user)
+    others = neighbour_ids[titles]
+    similarity = neighbour_scores[titles]
+    valid = (others >= 0) & ~np.isin(others, titles)
+    if not valid.any():
+        return []
+    candidates, inverse = np.unique(others[valid], return_inverse=True)
+    weights = np.bincount(inverse, similarity[valid])
+    weighted = np.bincount(
+        inverse, (similarity * deviations[:, None])[valid]
+    )
+    predicted = ratings.means[user] + weighted / weights
+    title_ids = ratings.title_ids[candidates]
+    order = np.lexsort((title_ids, -predicted))[:top]
+    return zip(title_ids[order].tolist(), predicted[order].tolist())
+
+
+def _recommendation_rows(ratings, top, neighbour_ids, neighbour_scores):
+    for user in range(len(ratings)):
+        predicted = _predictions(
+            ratings, user, neighbour_ids, neighbour_scores, top
+        )
+        author_id = int(ratings.author_ids[user])
+        for rank, (title_id, score) in enumerate(predicted, 1):
+            yield Recommendation(
+                user_id=author_id, title_id=title_id, rank=rank, score=score
+            )
+
+
+def rebuild_recommendations(top=TOP_K, neighbours=NEIGHBOURS,
+                            block_size=None, chunk_size=CHUNK_SIZE,
+                            memory_mb=MEMORY_MB):
+    """Пересчитывает рекомендации всех пользователей.
+
+    Оценки читаются из БД один раз. Без `block_size` размер блока
+    подбирается так, чтобы накопители заняли половину `memory_mb`;
+    вторая половина - под буферы пар оценок.
+    """
+    ratings = Ratings(chunk_size)
+    neighbour_ids, neighbour_scores = _neighbours(
+        ratings, neighbours, block_size, memory_mb
+    )
+
+    rows = _recommendation_rows(
+        ratings, top, neighbour_ids, neighbour_scores
+    )
+    created = 0
+    with transaction.atomic():
+        Recommendation.objects.all().delete()
+        while True:
+            batch = list(islice(rows, BATCH_SIZE))
+            if not batch:
+                break
+            Recommendation.objects.bulk_create(batch)
+            created += len(batch)
+    return created
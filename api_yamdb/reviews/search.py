@@ -0,0 +1,117 @@
+from django.db import connection
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+
+SEARCH_TABLE = 'reviews_title_fts'
+
+# Веса столбцов для bm25: совпадение в названии важнее описания.
+SEARCH_COLUMNS = (
+    ('name', 10.0),
+    ('description', 1.0),
+    ('year', 1.0),
+    ('category', 2.0),
+    ('genres', 2.0),
+)
+
+CREATE_SQL = (
+    f'CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5('
+    + ', '.join(name for name, _ in SEARCH_COLUMNS)
+    + ", tokenize = 'unicode61 remove_diacritics 2')"
+)
+
+INDEX_SQL = f'''
+    INSERT INTO {SEARCH_TABLE} (rowid, name, description, year, category,
+                                genres)
+    SELECT title.id, title.name, COALESCE(title.description, ''),
+           title.year,
+           COALESCE(category.name || ' ' || category.slug, ''),
+           COALESCE((
+               SELECT group_concat(genre.name || ' ' || genre.slug, ' ')
+               FROM reviews_genretitle AS genre_title
+               INNER JOIN reviews_genres AS genre
+                   ON genre.id = genre_title.genre_id
+               WHERE genre_title.title_id = title.id
+           ), '')
+    FROM reviews_title AS title
+    LEFT OUTER JOIN reviews_category AS category
+        ON category.id = title.category_id
+'''
+
+MATCH_SQL = f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s'
+
+RANK_WEIGHTS = ', '.join(str(weight) for _, weight in SEARCH_COLUMNS)
+
+RANK_SQL = (
+    f'SELECT bm25({SEARCH_TABLE}, {RANK_WEIGHTS}) FROM {SEARCH_TABLE} '
+    f'WHERE {SEARCH_TABLE} MATCH %s AND rowid = reviews_title.id'
+)
+
+
+def is_available():
+    """Полнотекстовый индекс есть только в SQLite."""
+    return connection.vendor == 'sqlite'
+
+
+def _chunks(ids, size=500):
+    ids = list(ids)
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def index_titles(title_ids):
+    """Переиндексирует перечисленные произведения."""
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        for chunk in _chunks(title_ids):
+            placeholders = ', '.join(['%s'] * len(chunk))
+            cursor.execute(
+                f'DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({placeholders})',
+                chunk,
+            )
+            cursor.execute(
+                f'{INDEX_SQL} WHERE title.id IN ({placeholders})', chunk
+            )
+
+
+def remove_titles(title_ids):
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        for chunk in _chunks(title_ids):
+            placeholders = ', '.join(['%s'] * len(chunk))
+            cursor.execute(
+                f'DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({placeholders})',
+                chunk,
+            )
+
+
+def rebuild_search_index():
+    """Строит полнотекстовый индекс заново по всем произведениям."""
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(CREATE_SQL)
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+        cursor.execute(INDEX_SQL)
+
+
+def build_match_query(terms):
+    """Каждый термин ищется как префикс, термины объединяются по И."""
+    return ' '.join(
+        '"{}"*'.format(term.replace('"', '""')) for term in terms
+    )
+
+
+def search_titles(queryset, terms):
+    """Фильтрует произведения по индексу и сортирует по релевантности.
+
+    Условие не ссылается на внешнюю таблицу, поэтому результат можно
+    использовать как подзапрос `pk__in`.
+    """
+    query = build_match_query(terms)
+    return queryset.filter(
+        pk__in=RawSQL(MATCH_SQL, (query,))
+    ).annotate(
+        search_rank=RawSQL(RANK_SQL, (query,), output_field=FloatField())
+    ).order_by('search_rank', 'pk')
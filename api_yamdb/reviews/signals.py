@@ -0,0 +1,152 @@
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+
+from reviews.counters import (TITLES, bump_revision, change_comments_count,
+                              change_counter, change_reviews_count)
+from reviews.models import (Category, Comment, Genres, RatingPrior, Review,
+                            Title)
+from reviews.ratings import (rebuild_weighted_ratings, sync_genre_ratings,
+                             update_title_rating)
+from reviews.search import index_titles, remove_titles
+from reviews.similarity import update_similar_titles
+
+
+def _loaded(instance, attname):
+    """Значение поля в том виде, в каком оно сохранено в БД."""
+    loaded_values = getattr(instance, '_loaded_values', {})
+    return loaded_values.get(attname, getattr(instance, attname))
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, **kwargs):
+    if created:
+        update_title_rating(instance.title_id, added=instance.score)
+        change_reviews_count(instance.title_id, 1)
+    else:
+        old_title_id = _loaded(instance, 'title_id')
+        old_score = _loaded(instance, 'score')
+        if old_title_id == instance.title_id:
+            if old_score == instance.score:
+                # Рейтинг прежний, но ответы с текстом отзыва устарели.
+                bump_revision(Title, instance.title_id)
+            else:
+                update_title_rating(
+                    instance.title_id, removed=old_score,
+                    added=instance.score,
+                )
+        else:
+            update_title_rating(old_title_id, removed=old_score)
+            update_title_rating(instance.title_id, added=instance.score)
+            change_reviews_count(old_title_id, -1)
+            change_reviews_count(instance.title_id, 1)
+    instance._loaded_values = {
+        **getattr(instance, '_loaded_values', {}),
+        'title_id': instance.title_id,
+        'score': instance.score,
+    }
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    title_id = _loaded(instance, 'title_id')
+    update_title_rating(title_id, removed=_loaded(instance, 'score'))
+    change_reviews_count(title_id, -1)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        change_comments_count(instance.review_id, instance.title_id, 1)
+    else:
+        bump_revision(Review, instance.review_id)
+        bump_revision(Title, instance.title_id)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    # Срабатывает и при каскадном удалении отзыва, произведения, автора.
+    change_comments_count(instance.review_id, instance.title_id, -1)
+
+
+@receiver(post_save, sender=RatingPrior)
+def rating_prior_saved(sender, instance, **kwargs):
+    rebuild_weighted_ratings(instance)
+
+
+@receiver(post_save, sender=Title)
+def title_saved(sender, instance, created, **kwargs):
+    index_titles([instance.pk])
+    if created:
+        change_counter(TITLES, 1)
+        if instance.category_id is not None:
+            # С общей категорией оно похоже на другие и без жанров.
+            update_similar_titles(instance.pk)
+    else:
+        bump_revision(Title, instance.pk)
+        # Жанры отслеживает title_genres_changed. Если категория не была
+        # загружена из БД, считаем, что она могла смениться.
+        loaded_values = getattr(instance, '_loaded_values', {})
+        if (
+            'category_id' not in loaded_values
+            or loaded_values['category_id'] != instance.category_id
+        ):
+            update_similar_titles(instance.pk)
+    instance._loaded_values = {
+        **getattr(instance, '_loaded_values', {}),
+        'category_id': instance.category_id,
+    }
+
+
+@receiver(post_delete, sender=Title)
+def title_deleted(sender, instance, **kwargs):
+    remove_titles([instance.pk])
+    change_counter(TITLES, -1)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    if action == 'pre_clear' and reverse:
+        instance._cleared_title_ids = list(
+            instance.titles.values_list('pk', flat=True)
+        )
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        title_ids = [instance.pk]
+    elif action == 'post_clear':
+        title_ids = instance._cleared_title_ids
+    else:
+        title_ids = list(pk_set)
+    index_titles(title_ids)
+    bump_revision(Title, *title_ids)
+    if action == 'post_add':
+        sync_genre_ratings(title_ids)
+    for title_id in title_ids:
+        update_similar_titles(title_id)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Genres)
+def catalog_item_saved(sender, instance, created, **kwargs):
+    if not created:
+        title_ids = list(instance.titles.values_list('pk', flat=True))
+        index_titles(title_ids)
+        bump_revision(Title, *title_ids)
+
+
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=Genres)
+def catalog_item_deleting(sender, instance, **kwargs):
+    instance._indexed_title_ids = list(
+        instance.titles.values_list('pk', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Genres)
+def catalog_item_deleted(sender, instance, **kwargs):
+    title_ids = getattr(instance, '_indexed_title_ids', ())
+    index_titles(title_ids)
+    bump_revision(Title, *title_ids)
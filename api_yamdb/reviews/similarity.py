@@ -0,0 +1,381 @@
+"""Похожие произведения по общим жанрам и категории.
+
+Сходство - коэффициент Жаккара между наборами признаков произведений
+(жанры и категория). При равном сходстве выше стоят произведения
+с большим взвешенным рейтингом.
+
+Полный пересчёт читает каталог один раз в массивы numpy и считает
+общие признаки блоками наборов по разреженному индексу признак -
+наборы. Правка одного произведения пересчитывается запросами к БД.
+"""
+import heapq
+from array import array
+from collections import defaultdict
+from itertools import islice
+
+import numpy as np
+from django.db import transaction
+from django.db.models import (Count, Exists, OuterRef, Q, Subquery,
+                              Value)
+from django.db.models.functions import Coalesce
+
+from reviews.models import GenreTitle, SimilarTitle, Title
+
+TOP_K = 10
+BATCH_SIZE = 5000
+CHUNK_SIZE = 10000
+MEMORY_MB = 256
+# Байт на пару наборов в блоке: общие признаки, сходство, ключ места.
+CELL_BYTES = 24
+# Байт на признак пары: её ячейка и позиция в списке наборов признака.
+PAIR_BYTES = 16
+# Сколько чужих списков читать одним запросом.
+LISTS_CHUNK_SIZE = 500
+
+
+def _popularity(pk, weighted_rating):
+    """Ключ сортировки: сначала с большим рейтингом, без рейтинга - в конце."""
+    if weighted_rating is None:
+        return (1, 0, pk)
+    return (0, -weighted_rating, pk)
+
+
+class Catalog:
+    """Произведения и их наборы признаков в массивах numpy.
+
+    Произведения пронумерованы по `_popularity`: номер `i` - это
+    `pks[i]`. Признаки - категория и жанры; одинаковые наборы признаков
+    слиты в один, и попарно сравниваются наборы, а не произведения.
+    Признаки набора `s` - `features[offsets[s]:offsets[s + 1]]`, наборы
+    с признаком `f` - `holders[starts[f]:starts[f + 1]]`, произведения
+    набора по популярности - `members[bounds[s]:bounds[s + 1]]`.
+    """
+
+    def __init__(self, chunk_size):
+        pks, categories, ratings = array('q'), array('q'), array('d')
+        titles = Title.objects.values_list(
+            'pk', 'category_id', 'weighted_rating'
+        ).iterator(chunk_size=chunk_size)
+        for pk, category_id, weighted_rating in titles:
+            pks.append(pk)
+            categories.append(-1 if category_id is None else category_id)
+            ratings.append(
+                np.nan if weighted_rating is None else weighted_rating
+            )
+        links = array('q')
+        for link in GenreTitle.objects.values_list(
+            'title_id', 'genre_id'
+        ).iterator(chunk_size=chunk_size):
+            links.extend(link)
+        pks = np.frombuffer(pks, dtype=np.int64)
+        categories = np.frombuffer(categories, dtype=np.int64)
+        ratings = np.frombuffer(ratings, dtype=np.float64)
+        links = np.frombuffer(links, dtype=np.int64).reshape(-1, 2)
+
+        unrated = np.isnan(ratings)
+        order = np.lexsort((pks, np.where(unrated, 0, -ratings), unrated))
+        self.pks = pks[order]
+        categories = categories[order]
+
+        # Жанры произведений, созданных после чтения каталога, пропускаем.
+        links = links[np.isin(links[:, 0], self.pks)]
+        by_pk = np.argsort(self.pks)
+        linked = by_pk[np.searchsorted(self.pks, links[:, 0], sorter=by_pk)]
+        # Коды признаков: категория - чётный, жанр - нечётный.
+        with_category = np.flatnonzero(categories >= 0)
+        pairs = np.unique(np.column_stack((
+            np.concatenate((with_category, linked)),
+            np.concatenate((
+                categories[with_category] * 2, links[:, 1] * 2 + 1
+            )),
+        )), axis=0)
+        codes, features = np.unique(pairs[:, 1], return_inverse=True)
+        rows = pairs[:, 0]
+
+        # Строка признаков каждого произведения, дополненная -1: по ним
+        # np.unique находит одинаковые наборы.
+        counts = np.bincount(rows, minlength=len(self.pks))
+        matrix = np.full((len(self.pks), counts.max(initial=0)), -1)
+        matrix[rows, np.arange(len(rows)) - (np.cumsum(counts) - counts)[
+            rows
+        ]] = features
+        featured = np.flatnonzero(counts)
+        signatures, title_sets = np.unique(
+            matrix[featured], axis=0, return_inverse=True
+        )
+        title_sets = title_sets.reshape(-1)
+
+        present = signatures >= 0
+        self.sizes = present.sum(axis=1)
+        self.offsets = _bounds(self.sizes)
+        self.features = signatures[present]
+        by_feature = np.argsort(self.features, kind='stable')
+        self.holders = np.repeat(
+            np.arange(len(signatures)), self.sizes
+        )[by_feature]
+        self.starts = _bounds(np.bincount(self.features, minlength=len(codes)))
+        # Номера уже идут по популярности, устойчивая сортировка
+        # сохраняет этот порядок внутри набора.
+        self.members = featured[np.argsort(title_sets, kind='stable')]
+        self.bounds = _bounds(
+            np.bincount(title_sets, minlength=len(signatures))
+        )
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def heads(self, limit):
+        """Первые `limit` произведений каждого набора, дополненные -1."""
+        counts = np.diff(self.bounds)
+        heads = np.full((len(self), limit), -1)
+        ranks = np.arange(len(self.members)) - np.repeat(
+            self.bounds[:-1], counts
+        )
+        keep = ranks < limit
+        heads[
+            np.repeat(np.arange(len(self)), counts)[keep], ranks[keep]
+        ] = self.members[keep]
+        return heads
+
+    def shared(self, start, end):
+        """Число общих признаков у наборов [start, end) со всеми."""
+        size = len(self)
+        features = self.features[self.offsets[start]:self.offsets[end]]
+        owners = np.repeat(np.arange(end - start), self.sizes[start:end])
+        first = self.starts[features]
+        counts = self.starts[features + 1] - first
+        positions = np.repeat(
+            first - np.cumsum(counts) + counts, counts
+        ) + np.arange(counts.sum())
+        cells = np.repeat(owners, counts) * size + self.holders[positions]
+        return np.bincount(
+            cells, minlength=(end - start) * size
+        ).reshape(end - start, size)
+
+
+def _bounds(counts):
+    return np.concatenate(([0], np.cumsum(counts)))
+
+
+def _block_ranked(catalog, heads, start, end):
+    """Лучшие произведения для наборов [start, end).
+
+    Возвращает номера произведений, их сходство и маску заполненных
+    мест; мест в строке столько же, сколько столбцов в `heads`.
+    """
+    limit = heads.shape[1]
+    shared = catalog.shared(start, end)
+    scores = shared / (
+        catalog.sizes[start:end, None] + catalog.sizes - shared
+    )
+    # Ключ места: уровень сходства по убыванию, затем популярность.
+    _, levels = np.unique(-scores, return_inverse=True)
+    levels = levels.reshape(scores.shape) * (len(catalog.pks) + 1)
+    never = np.iinfo(np.int64).max
+    keys = np.where(shared > 0, levels + heads[:, 0], never)
+    # Произведение из набора вне первых `limit` по лучшему члену
+    # уступает им всем, поэтому хватает этих наборов.
+    width = min(limit, len(catalog))
+    chosen = np.argpartition(keys, width - 1, axis=1)[:, :width]
+    rows = np.arange(end - start)[:, None]
+    candidates = heads[chosen]
+    valid = (candidates >= 0) & (shared[rows, chosen] > 0)[..., None]
+    pair_keys = np.where(
+        valid, levels[rows, chosen][..., None] + candidates, never
+    ).reshape(end - start, -1)
+    best = np.argsort(pair_keys, axis=1)[:, :limit]
+    similarity = np.broadcast_to(
+        scores[rows, chosen][..., None], candidates.shape
+    ).reshape(end - start, -1)
+    return (
+        candidates.reshape(end - start, -1)[rows, best],
+        similarity[rows, best],
+        pair_keys[rows, best] != never,
+    )
+
+
+def _similar_rows(top, memory_mb=MEMORY_MB, chunk_size=CHUNK_SIZE):
+    catalog = Catalog(chunk_size)
+    if not len(catalog):
+        return
+    # Одно лишнее место: в списке может оказаться само произведение.
+    heads = catalog.heads(top + 1)
+    cell_bytes = CELL_BYTES + PAIR_BYTES * int(catalog.sizes.max())
+    block_size = max(memory_mb * 2 ** 20 // (cell_bytes * len(catalog)), 1)
+    for start in range(0, len(catalog), block_size):
+        end = min(start + block_size, len(catalog))
+        titles, scores, valid = _block_ranked(catalog, heads, start, end)
+        for row, signature in enumerate(range(start, end)):
+            ranked = list(zip(
+                catalog.pks[titles[row][valid[row]]].tolist(),
+                scores[row][valid[row]].tolist(),
+            ))
+            members = catalog.members[
+                catalog.bounds[signature]:catalog.bounds[signature + 1]
+            ]
+            for title_id in catalog.pks[members].tolist():
+                neighbours = [
+                    (pk, score) for pk, score in ranked if pk != title_id
+                ][:top]
+                for rank, (pk, score) in enumerate(neighbours, 1):
+                    yield SimilarTitle(
+                        title_id=title_id, similar_id=pk, rank=rank,
+                        score=score,
+                    )
+
+
+def rebuild_similar_titles(top=TOP_K, memory_mb=MEMORY_MB,
+                           chunk_size=CHUNK_SIZE):
+    """Пересчитывает списки похожих произведений для всего каталога.
+
+    Каталог читается из БД один раз; блок наборов, сравниваемых за
+    проход, подбирается так, чтобы уложиться в `memory_mb`.
+    """
+    rows = _similar_rows(top, memory_mb, chunk_size)
+    created = 0
+    with transaction.atomic():
+        SimilarTitle.objects.all().delete()
+        while True:
+            batch = list(islice(rows, BATCH_SIZE))
+            if not batch:
+                break
+            SimilarTitle.objects.bulk_create(batch)
+            created += len(batch)
+    return created
+
+
+def _count_links(**filters):
+    return Coalesce(Subquery(
+        GenreTitle.objects.filter(title=OuterRef('pk'), **filters)
+        .order_by()
+        .values('title')
+        .annotate(value=Count('pk'))
+        .values('value')
+    ), 0)
+
+
+def _scores_for(title_id):
+    """Сходство произведения с каждым, у кого есть общий признак."""
+    title = Title.objects.filter(pk=title_id).values(
+        'category_id', 'weighted_rating'
+    ).first()
+    if title is None:
+        return None, {}
+    # Своё место нужно для чужих списков похожих.
+    popularity = {title_id: _popularity(title_id, title['weighted_rating'])}
+    category_id = title['category_id']
+    genres = set(GenreTitle.objects.filter(
+        title_id=title_id
+    ).values_list('genre_id', flat=True))
+    size = len(genres) + (category_id is not None)
+    if not size:
+        return popularity, {}
+    # Q(Exists(...)) в Django 3.2 не объединяется через |, поэтому
+    # признак общего жанра сначала выносится в аннотацию.
+    titles = Title.objects.exclude(pk=title_id)
+    overlap = Q(category_id=category_id) if category_id is not None else Q()
+    shared_genres = Value(0)
+    if genres:
+        titles = titles.annotate(has_shared_genre=Exists(
+            GenreTitle.objects.filter(
+                title=OuterRef('pk'), genre_id__in=genres
+            )
+        ))
+        overlap |= Q(has_shared_genre=True)
+        shared_genres = _count_links(genre_id__in=genres)
+    candidates = titles.filter(overlap).annotate(
+        shared_genres=shared_genres,
+        genres_count=_count_links(),
+    ).values_list(
+        'pk', 'category_id', 'weighted_rating', 'shared_genres',
+        'genres_count',
+    )
+    scores = {}
+    for pk, other_category, weighted, shared, count in candidates.iterator():
+        shared += category_id is not None and other_category == category_id
+        union = size + count + (other_category is not None) - shared
+        scores[pk] = shared / union
+        popularity[pk] = _popularity(pk, weighted)
+    return popularity, scores
+
+
+def _ranked(scores, popularity, top):
+    return [
+        (pk, scores[pk]) for pk in heapq.nsmallest(
+            top, scores, key=lambda pk: (-scores[pk], popularity[pk])
+        )
+    ]
+
+
+def _chunks(items, size=LISTS_CHUNK_SIZE):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _other_lists(title_id, popularity, scores, top):
+    """Чужие списки, куда произведение входит или должно войти.
+
+    Произведение вставляется, заменяется или убирается, список заново
+    обрезается до `top`. Если из полного списка оно ушло или опустилось,
+    следующий кандидат неизвестен, и список считается заново.
+    """
+    holders = SimilarTitle.objects.filter(
+        similar_id=title_id
+    ).values_list('title_id', flat=True)
+    affected = set(scores).union(holders)
+    lists = {}
+    for chunk in _chunks(affected):
+        current = defaultdict(list)
+        rows = SimilarTitle.objects.filter(title_id__in=chunk).order_by(
+            'title_id', 'rank'
+        ).values_list(
+            'title_id', 'similar_id', 'score', 'similar__weighted_rating'
+        )
+        for other, pk, score, weighted_rating in rows.iterator():
+            current[other].append((pk, score))
+            popularity.setdefault(pk, _popularity(pk, weighted_rating))
+        for other in chunk:
+            old = current[other]
+            entries = dict(old)
+            old_score = entries.pop(title_id, None)
+            new_score = scores.get(other)
+            if old_score is not None and len(old) >= top and (
+                new_score is None or new_score < old_score
+            ):
+                own_popularity, own_scores = _scores_for(other)
+                if own_popularity is not None:
+                    lists[other] = _ranked(own_scores, own_popularity, top)
+                continue
+            if new_score is not None:
+                entries[title_id] = new_score
+            ranked = _ranked(entries, popularity, top)
+            if ranked != old:
+                lists[other] = ranked
+    return lists
+
+
+def update_similar_titles(title_id, top=TOP_K):
+    """Обновляет похожие после смены жанров или категории произведения.
+
+    Пересчитывает список самого произведения и поправляет списки тех,
+    с кем у него есть или был общий признак.
+    """
+    popularity, scores = _scores_for(title_id)
+    if popularity is None:
+        return
+    lists = _other_lists(title_id, popularity, scores, top)
+    lists[title_id] = _ranked(scores, popularity, top)
+    with transaction.atomic():
+        for chunk in _chunks(lists):
+            SimilarTitle.objects.filter(title_id__in=chunk).delete()
+        SimilarTitle.objects.bulk_create(
+            (
+                SimilarTitle(
+                    title_id=owner, similar_id=pk, rank=rank, score=score
+                )
+                for owner, ranked in lists.items()
+                for rank, (pk, score) in enumerate(ranked, 1)
+            ),
+            batch_size=BATCH_SIZE,
+        )
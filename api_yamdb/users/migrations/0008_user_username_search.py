@@ -0,0 +1,28 @@
+# Generated by Django 3.2 on 2026-10-18 16:45
+
+import api.fields
+from django.db import migrations
+
+
+def fill_username_search(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    users = list(User.objects.only('pk', 'username'))
+    for user in users:
+        user.username_search = api.fields.normalize_search(user.username)
+    User.objects.bulk_update(users, ['username_search'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_alter_user_username'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='username_search',
+            field=api.fields.NormalizedCharField(db_index=True, default='', editable=False, max_length=150, source='username'),
+        ),
+        migrations.RunPython(fill_username_search, migrations.RunPython.noop),
+    ]
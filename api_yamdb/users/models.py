@@ -1,6 +1,7 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
+from api.fields import NormalizedCharField
 from users.validators import no_me_as_username_allowed, UsernameValidator
 
 
@@ -19,6 +20,7 @@ class User(AbstractUser):
         unique=True,
         validators=[username_validator, no_me_as_username_allowed],
     )
+    username_search = NormalizedCharField(max_length=150, source='username')
     email = models.EmailField('Email', max_length=254, unique=True)
     first_name = models.CharField(max_length=150, blank=True)
     last_name = models.CharField(max_length=150, blank=True)
@@ -41,6 +43,14 @@ class User(AbstractUser):
     def __str__(self):
         return str(self.username)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Значения из БД нужны сигналам: кеш ответов с именами авторов
+        # сбрасывается только при смене username.
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
     @property
     def is_admin(self):
         return self.role == UserRoles.ADMIN or self.is_superuser
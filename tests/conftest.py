@@ -1,6 +1,7 @@
 import os
 import sys
 
+import pytest
 from django.utils.version import get_version
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -33,3 +34,10 @@ assert get_version() < '4.0.0', 'Пожалуйста, используйте в
 pytest_plugins = [
     'tests.fixtures.fixture_user',
 ]
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    from django.core.cache import caches
+    for cache in caches.all():
+        cache.clear()
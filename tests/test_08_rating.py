@@ -0,0 +1,114 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from tests.utils import create_reviews, create_single_review
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08Rating:
+
+    def get_title(self, title_id):
+        from reviews.models import Title
+        return Title.objects.get(pk=title_id)
+
+    def test_01_rating_follows_reviews(self, admin_client, admin, user,
+                                       user_client, moderator,
+                                       moderator_client):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        title_id = titles[0]['id']
+        title = self.get_title(title_id)
+        assert (title.rating_sum, title.rating_count) == (15, 3), (
+            'Проверьте, что при создании отзыва обновляются сумма и '
+            'количество оценок произведения.'
+        )
+        assert title.rating == 5
+
+        url = f'/api/v1/titles/{title_id}/reviews/{reviews[1]["id"]}/'
+        user_client.patch(url, data={'score': 8})
+        title = self.get_title(title_id)
+        assert (title.rating_sum, title.rating_count) == (18, 3), (
+            'Проверьте, что при изменении оценки отзыва пересчитывается '
+            'рейтинг произведения.'
+        )
+        assert title.rating == 6
+
+        user_client.patch(url, data={'text': 'Без изменения оценки'})
+        assert self.get_title(title_id).rating_sum == 18
+
+        user_client.delete(url)
+        title = self.get_title(title_id)
+        assert (title.rating_sum, title.rating_count) == (10, 2), (
+            'Проверьте, что при удалении отзыва пересчитывается рейтинг '
+            'произведения.'
+        )
+
+        moderator.delete()
+        title = self.get_title(title_id)
+        assert (title.rating_sum, title.rating_count) == (5, 1), (
+            'Проверьте, что при каскадном удалении отзывов вместе с '
+            'пользователем пересчитывается рейтинг произведения.'
+        )
+
+        response = admin_client.delete(f'/api/v1/titles/{title_id}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT, (
+            'Проверьте, что произведение с отзывами удаляется вместе с ними.'
+        )
+
+        response = admin_client.get(f'/api/v1/titles/{titles[1]["id"]}/')
+        assert response.json().get('rating') is None
+
+    def test_02_rating_in_response(self, admin_client, user_client):
+        reviews, titles = create_reviews(admin_client, {})
+        create_single_review(user_client, titles[1]['id'], 'Неплохо', 7)
+        response = admin_client.get(f'/api/v1/titles/{titles[1]["id"]}/')
+        assert response.json().get('rating') == 7, (
+            'Проверьте, что поле `rating` берётся из сохранённого '
+            'рейтинга произведения.'
+        )
+
+    def test_03_rebuild_command(self, admin_client, admin, user,
+                                user_client):
+        from reviews.models import Review, Title
+        _, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        Review.objects.filter(author=user).update(score=9)
+        Title.objects.update(rating_sum=0, rating_count=0, rating=None)
+
+        with pytest.raises(CommandError):
+            call_command('rebuild_ratings_command', '--check',
+                         stdout=StringIO())
+
+        call_command('rebuild_ratings_command', stdout=StringIO())
+        title = self.get_title(titles[0]['id'])
+        assert (title.rating_sum, title.rating_count) == (14, 2), (
+            'Проверьте, что команда `rebuild_ratings_command` пересчитывает '
+            'рейтинги по отзывам.'
+        )
+        assert title.rating == 7
+        assert self.get_title(titles[1]['id']).rating is None
+        call_command('rebuild_ratings_command', '--check', stdout=StringIO())
+
+    def test_04_title_save_keeps_rating(self, admin_client, admin, user,
+                                        user_client):
+        from reviews.models import Title
+        _, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        stale = Title.objects.get(pk=titles[0]['id'])
+        create_single_review(user_client, titles[1]['id'], 'Другой', 3)
+        Title.objects.filter(pk=titles[0]['id']).update(rating_sum=12)
+        stale.name = 'Новое название'
+        stale.save()
+        assert self.get_title(titles[0]['id']).rating_sum == 12, (
+            'Проверьте, что сохранение произведения не перезаписывает '
+            'накопленный рейтинг устаревшими значениями.'
+        )
@@ -0,0 +1,43 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_many_titles, create_titles
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(context.captured_queries)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09QueryCount:
+
+    def test_01_titles_list(self, client):
+        create_many_titles(20)
+        small_page = count_queries(client, '/api/v1/titles/?limit=2')
+        large_page = count_queries(client, '/api/v1/titles/?limit=20')
+        assert small_page == large_page, (
+            'Проверьте, что количество запросов к БД при GET-запросе к '
+            '`/api/v1/titles/` не зависит от размера страницы.'
+        )
+        assert large_page <= 3
+
+    def test_02_title_detail(self, client):
+        titles = create_many_titles(1)
+        assert count_queries(client, f'/api/v1/titles/{titles[0].pk}/') <= 2
+
+    def test_03_title_write_representation(self, admin_client,
+                                           django_assert_num_queries):
+        from api.serializers import TitlesPostSerializer
+        from reviews.models import Title
+        titles, _, _ = create_titles(admin_client)
+        title = Title.objects.get(pk=titles[0]['id'])
+        with django_assert_num_queries(2):
+            data = TitlesPostSerializer(title).data
+        assert len(data['genre']) == len(titles[0]['genre']), (
+            'Проверьте, что `TitlesPostSerializer.to_representation` '
+            'загружает категорию и жанры фиксированным числом запросов.'
+        )
@@ -0,0 +1,117 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_many_titles
+
+
+def collect_pages(client, url):
+    results = []
+    pages = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert 'count' not in data, (
+            'Проверьте, что в режиме курсора ответ не содержит `count`.'
+        )
+        pages.append(data)
+        results.extend(data['results'])
+        url = data['next']
+    return results, pages
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10CursorPagination:
+
+    def test_01_titles_cursor(self, client):
+        titles = create_many_titles(7)
+        results, pages = collect_pages(
+            client, '/api/v1/titles/?cursor=&limit=3'
+        )
+        assert [title['id'] for title in results] == [
+            title.pk for title in titles
+        ], (
+            'Проверьте, что в режиме курсора `/api/v1/titles/` '
+            'возвращает все произведения по возрастанию id без пропусков.'
+        )
+        assert len(pages) == 3
+        assert pages[0]['previous'] is None
+
+        response = client.get(pages[2]['previous'])
+        assert [title['id'] for title in response.json()['results']] == [
+            title['id'] for title in pages[1]['results']
+        ], 'Проверьте ссылку `previous` в режиме курсора.'
+
+    def test_02_reviews_cursor_with_equal_dates(self, client,
+                                                django_user_model):
+        from reviews.models import Review
+        title = create_many_titles(1)[0]
+        for idx in range(6):
+            author = django_user_model.objects.create_user(
+                username=f'author{idx}', email=f'author{idx}@yamdb.fake'
+            )
+            Review.objects.create(
+                title=title, author=author, text=f'Отзыв {idx}', score=5
+            )
+        pub_date = Review.objects.first().pub_date
+        Review.objects.filter(id__lte=3).update(pub_date=pub_date)
+
+        results, _ = collect_pages(
+            client, f'/api/v1/titles/{title.pk}/reviews/?cursor=&limit=2'
+        )
+        expected = list(
+            Review.objects.order_by('-pub_date', '-id')
+            .values_list('id', flat=True)
+        )
+        assert [review['id'] for review in results] == expected, (
+            'Проверьте, что отзывы в режиме курсора упорядочены по '
+            '(`pub_date`, `id`) и не теряются при одинаковых датах.'
+        )
+
+    def test_03_comments_cursor(self, client, admin):
+        from reviews.models import Comment, Review
+        title = create_many_titles(1)[0]
+        review = Review.objects.create(
+            title=title, author=admin, text='Отзыв', score=5
+        )
+        comments = [
+            Comment.objects.create(
+                title=title, review=review, author=admin, text=str(idx)
+            )
+            for idx in range(5)
+        ]
+        results, _ = collect_pages(
+            client,
+            f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/'
+            '?cursor=&limit=2'
+        )
+        assert [comment['id'] for comment in results] == [
+            comment.pk for comment in comments
+        ]
+
+    def test_04_invalid_cursor(self, client):
+        create_many_titles(2)
+        response = client.get('/api/v1/titles/?cursor=broken')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        response = client.get('/api/v1/titles/?limit=1')
+        assert response.json()['count'] == 2, (
+            'Проверьте, что без параметра `cursor` пагинация не изменилась.'
+        )
+
+    def test_05_cursor_conflicts(self, client):
+        titles = create_many_titles(2)
+        for query in ('ordering=-year', 'search=title'):
+            response = client.get(f'/api/v1/titles/?cursor=&{query}')
+            assert response.status_code == HTTPStatus.BAD_REQUEST, (
+                'Проверьте, что `cursor` вместе с порядком из `ordering` или '
+                '`search` даёт ошибку 400, а не молча теряет порядок.'
+            )
+            assert query.split('=')[0] in response.json()
+        response = client.get(
+            f'/api/v1/titles/{titles[0].pk}/reviews/'
+            '?cursor=&ordering=score'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        response = client.get('/api/v1/titles/?cursor=&ordering=')
+        assert response.status_code == HTTPStatus.OK
@@ -0,0 +1,65 @@
+import pytest
+
+from tests.utils import create_titles
+
+
+def search(client, query):
+    response = client.get('/api/v1/titles/', {'search': query})
+    assert response.status_code == 200
+    return [title['name'] for title in response.json()['results']]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11TitleSearch:
+
+    def test_01_search_fields(self, admin_client, client):
+        create_titles(admin_client)
+        assert search(client, 'Терминатор') == ['Терминатор'], (
+            'Проверьте, что поиск по `/api/v1/titles/?search=` находит '
+            'произведение по названию.'
+        )
+        assert search(client, 'терм') == ['Терминатор'], (
+            'Проверьте, что поиск находит произведение по началу слова '
+            'без учёта регистра.'
+        )
+        assert search(client, 'back') == ['Терминатор']
+        assert search(client, 'drama') == ['Крепкий орешек']
+        assert search(client, 'Драма') == ['Крепкий орешек']
+        assert search(client, 'книги') == ['Крепкий орешек']
+        assert search(client, '1984') == ['Терминатор']
+        assert search(client, 'орешек 1984') == []
+        assert search(client, '"') == []
+
+    def test_02_index_follows_writes(self, admin_client, client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[1]["id"]}/'
+        admin_client.patch(url, data={'name': 'Бегущий по лезвию'})
+        assert search(client, 'орешек') == []
+        assert search(client, 'лезвию') == ['Бегущий по лезвию']
+
+        admin_client.patch(url, data={'genre': ['comedy']})
+        assert search(client, 'drama') == []
+        assert sorted(search(client, 'comedy')) == [
+            'Бегущий по лезвию', 'Терминатор'
+        ]
+
+        admin_client.delete('/api/v1/genres/comedy/')
+        assert search(client, 'comedy') == []
+        assert search(client, 'horror') == ['Терминатор']
+
+        admin_client.delete(url)
+        assert search(client, 'лезвию') == []
+
+    def test_03_ranking(self, admin_client, client):
+        create_titles(admin_client)
+        admin_client.post('/api/v1/titles/', data={
+            'name': 'Орешки',
+            'year': 2000,
+            'genre': ['comedy'],
+            'category': 'films',
+            'description': 'Про Терминатора ничего нет.',
+        })
+        assert search(client, 'терминатор') == ['Терминатор', 'Орешки'], (
+            'Проверьте, что совпадение в названии ранжируется выше '
+            'совпадения в описании.'
+        )
@@ -0,0 +1,99 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def search(client, url, query):
+    response = client.get(url, {'search': query})
+    assert response.status_code == 200
+    return response.json()['results']
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12NormalizedSearch:
+
+    def test_01_cyrillic_case(self, admin_client):
+        admin_client.post(
+            '/api/v1/categories/', data={'name': 'Фильмы', 'slug': 'films'}
+        )
+        admin_client.post(
+            '/api/v1/genres/', data={'name': 'Драма', 'slug': 'drama'}
+        )
+        admin_client.post('/api/v1/titles/', data={
+            'name': 'Побег из Шоушенка',
+            'year': 1994,
+            'genre': ['drama'],
+            'category': 'films',
+        })
+        assert search(admin_client, '/api/v1/categories/', 'фильм') == [
+            {'name': 'Фильмы', 'slug': 'films'}
+        ], (
+            'Проверьте, что поиск по `/api/v1/categories/` не зависит от '
+            'регистра кириллических букв.'
+        )
+        assert search(admin_client, '/api/v1/genres/', 'ДРАМ') == [
+            {'name': 'Драма', 'slug': 'drama'}
+        ]
+        titles = search(admin_client, '/api/v1/titles/', 'шоушенк')
+        assert [title['name'] for title in titles] == ['Побег из Шоушенка']
+
+    def test_02_username_search(self, admin_client, admin, user):
+        results = search(admin_client, '/api/v1/users/', 'testad')
+        assert [item['username'] for item in results] == [admin.username], (
+            'Проверьте, что поиск по `/api/v1/users/` находит пользователя '
+            'по началу имени без учёта регистра.'
+        )
+        assert search(admin_client, '/api/v1/users/', 'user') == [], (
+            'Проверьте, что по умолчанию поиск идёт по началу имени.'
+        )
+        response = admin_client.get(
+            '/api/v1/users/', {'search': 'user', 'search_match': 'contains'}
+        )
+        assert [
+            item['username'] for item in response.json()['results']
+        ] == [user.username], (
+            'Проверьте, что `search_match=contains` находит пользователя '
+            'по части имени.'
+        )
+        response = admin_client.get(
+            '/api/v1/users/', {'search': 'user', 'search_match': 'regex'}
+        )
+        assert response.status_code == 400
+
+    def test_03_shadow_fields(self, admin):
+        from reviews.models import Category, Genres
+        Category.objects.bulk_create([Category(name='ЁЛКИ', slug='elki')])
+        assert Category.objects.get(slug='elki').name_search == 'ёлки', (
+            'Проверьте, что нормализованное поле заполняется при '
+            '`bulk_create`.'
+        )
+        genre = Genres.objects.create(name='Рок', slug='rock')
+        genre.name = 'ПОП'
+        genre.save()
+        assert Genres.objects.get(pk=genre.pk).name_search == 'поп'
+        assert admin.username_search == 'testadmin'
+        assert list(
+            type(admin).objects.filter(username_search__prefix='testa')
+        ) == [admin]
+
+    @pytest.mark.parametrize('url, table', [
+        ('/api/v1/users/', 'users_user'),
+        ('/api/v1/categories/', 'reviews_category'),
+        ('/api/v1/genres/', 'reviews_genres'),
+    ])
+    def test_04_prefix_uses_index(self, admin_client, url, table):
+        with CaptureQueriesContext(connection) as context:
+            search(admin_client, url, 'тест')
+        queries = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT') and '_search' in query['sql']
+        ]
+        assert queries
+        with connection.cursor() as cursor:
+            for sql in queries:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plan = ' | '.join(str(row[-1]) for row in cursor.fetchall())
+                assert f'SCAN {table}' not in plan.replace('"', ''), (
+                    f'Проверьте, что поиск по `{url}` использует индекс '
+                    f'теневого поля: {sql}\n{plan}'
+                )
@@ -0,0 +1,62 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13TitleFacets:
+    url = '/api/v1/titles/facets/'
+
+    def test_01_facets(self, admin_client, client):
+        create_titles(admin_client)
+        admin_client.post('/api/v1/titles/', data={
+            'name': 'Бегущий по лезвию',
+            'year': 1982,
+            'genre': ['drama'],
+            'category': 'films',
+        })
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(self.url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Эндпоинт `{self.url}` не найден или недоступен без токена.'
+        )
+        assert len(context.captured_queries) == 1, (
+            'Проверьте, что фасеты считаются одним запросом к БД.'
+        )
+        data = response.json()
+        assert data['genre'] == [
+            {'name': 'Драма', 'slug': 'drama', 'count': 2},
+            {'name': 'Комедия', 'slug': 'comedy', 'count': 1},
+            {'name': 'Ужасы', 'slug': 'horror', 'count': 1},
+        ]
+        assert data['category'] == [
+            {'name': 'Фильм', 'slug': 'films', 'count': 2},
+            {'name': 'Книги', 'slug': 'books', 'count': 1},
+        ]
+        assert data['year'] == [{'from': 1980, 'to': 1989, 'count': 3}]
+        assert 'max-age' in response['Cache-Control']
+
+    def test_02_facets_filtered(self, admin_client, client):
+        create_titles(admin_client)
+        data = client.get(self.url, {'genre': 'horror'}).json()
+        assert data['genre'] == [
+            {'name': 'Комедия', 'slug': 'comedy', 'count': 1},
+            {'name': 'Ужасы', 'slug': 'horror', 'count': 1},
+        ], (
+            'Проверьте, что фасеты считаются по произведениям, отобранным '
+            'фильтрами `GenreFilter`.'
+        )
+        assert data['category'] == [
+            {'name': 'Фильм', 'slug': 'films', 'count': 1}
+        ]
+
+        data = client.get(self.url, {'search': 'орешек'}).json()
+        assert data['category'] == [
+            {'name': 'Книги', 'slug': 'books', 'count': 1}
+        ]
+        data = client.get(self.url, {'year': 1900}).json()
+        assert data == {'genre': [], 'category': [], 'year': []}
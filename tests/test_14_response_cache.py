@@ -0,0 +1,168 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_single_review, create_titles
+
+
+def get(client, url, params=None):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, params)
+    assert response.status_code == HTTPStatus.OK
+    return response, len(context.captured_queries)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14ResponseCache:
+
+    def test_01_titles_cached(self, admin_client, client):
+        titles, _, _ = create_titles(admin_client)
+        first, _ = get(client, '/api/v1/titles/')
+        second, queries = get(client, '/api/v1/titles/')
+        assert first['X-Cache'] == 'MISS'
+        assert second['X-Cache'] == 'HIT', (
+            'Проверьте, что повторный GET-запрос к `/api/v1/titles/` '
+            'отдаётся из кеша.'
+        )
+        assert queries == 0
+        assert second.json() == first.json()
+
+        response, _ = get(client, '/api/v1/titles/?limit=1&year=1984')
+        assert response['X-Cache'] == 'MISS'
+        response, _ = get(client, '/api/v1/titles/?year=1984&limit=1')
+        assert response['X-Cache'] == 'HIT', (
+            'Проверьте, что ключ кеша не зависит от порядка параметров.'
+        )
+
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        get(client, url)
+        response, _ = get(client, url)
+        assert response['X-Cache'] == 'HIT'
+
+    def test_02_invalidation(self, admin_client, client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        get(client, url)
+        create_single_review(user_client, titles[0]['id'], 'Отлично', 9)
+        response, _ = get(client, url)
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что новый отзыв сбрасывает кеш произведений.'
+        )
+        assert response.json()['rating'] == 9
+
+        get(client, '/api/v1/genres/')
+        admin_client.patch(url, data={'genre': ['drama']})
+        response, _ = get(client, url)
+        assert [genre['slug'] for genre in response.json()['genre']] == [
+            'drama'
+        ]
+        response, _ = get(client, '/api/v1/genres/')
+        assert response['X-Cache'] == 'HIT', (
+            'Проверьте, что изменение связей жанров не сбрасывает кеш '
+            'списка жанров.'
+        )
+
+        get(client, '/api/v1/categories/')
+        admin_client.delete('/api/v1/categories/books/')
+        response, _ = get(client, '/api/v1/categories/')
+        assert response['X-Cache'] == 'MISS'
+        assert len(response.json()['results']) == 1
+
+    def test_03_stats(self, admin_client, client, user_client):
+        before = admin_client.get('/api/v1/cache/stats/').json()
+        get(client, '/api/v1/genres/')
+        get(client, '/api/v1/genres/')
+        response = admin_client.get('/api/v1/cache/stats/')
+        assert response.json() == {
+            'hits': before['hits'] + 1, 'misses': before['misses'] + 1,
+        }
+        response = user_client.get('/api/v1/cache/stats/')
+        assert response.status_code == HTTPStatus.FORBIDDEN
+
+    def test_04_shared_versions(self, admin_client, client, settings,
+                                monkeypatch):
+        from django.core.cache.backends.filebased import FileBasedCache
+
+        from api import cache
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        etag = client.get(url)['ETag']
+        # Другой воркер: свой объект кеша над тем же каталогом.
+        params = settings.CACHES[settings.RESPONSE_CACHE_ALIAS]
+        other = FileBasedCache(params['LOCATION'], {})
+        with monkeypatch.context() as patch:
+            patch.setattr(cache, 'get_cache', lambda: other)
+            assert client.get(url)['ETag'] == etag, (
+                'Проверьте, что ETag одинаков во всех процессах.'
+            )
+            admin_client.patch(url, data={'name': 'Терминатор 2'})
+        assert client.get(url)['ETag'] != etag, (
+            'Проверьте, что изменение в одном процессе видно остальным.'
+        )
+
+    def test_05_locmem_backend(self, admin_client, client, settings):
+        titles, _, _ = create_titles(admin_client)
+        settings.CACHES = {
+            **settings.CACHES,
+            settings.RESPONSE_CACHE_ALIAS: {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            },
+        }
+        url = '/api/v1/titles/'
+        first = client.get(url)
+        second, queries = get(client, url)
+        assert first['X-Cache'] == 'MISS' and second['X-Cache'] == 'HIT', (
+            'Проверьте, что кеш в памяти процесса поддерживается для '
+            'развёртывания в одном процессе.'
+        )
+        assert not queries and second['ETag'] == first['ETag']
+
+    def test_06_redis_backend(self, admin_client, client, settings,
+                              monkeypatch):
+        import fakeredis
+        import redis
+        from django.core.exceptions import ImproperlyConfigured
+
+        from api.cache_backends import RedisCache
+        server = fakeredis.FakeServer()
+        monkeypatch.setattr(
+            redis.Redis, 'from_url',
+            lambda url: fakeredis.FakeRedis(server=server),
+        )
+        backend = RedisCache('redis://fake/1', {'KEY_PREFIX': 'yamdb'})
+        assert backend.add('views', 1) and not backend.add('views', 2)
+        assert backend.incr('views', 2) == 3
+        backend.set('title', {'id': 1}, timeout=None)
+        assert backend.get('title') == {'id': 1}
+        assert backend.get('missing', 'default') == 'default'
+        backend.delete('title')
+        assert not backend.has_key('title')
+
+        other = fakeredis.FakeRedis(server=server)
+        other.set('foreign', 'value')
+        backend.clear()
+        assert backend.get('views') is None
+        assert other.get('foreign') == b'value', (
+            'Проверьте, что `RedisCache.clear()` удаляет только ключи '
+            'с KEY_PREFIX.'
+        )
+        with pytest.raises(ImproperlyConfigured):
+            RedisCache('redis://fake/1', {})
+
+        settings.CACHES = {
+            **settings.CACHES,
+            settings.RESPONSE_CACHE_ALIAS: {
+                'BACKEND': 'api.cache_backends.RedisCache',
+                'LOCATION': 'redis://fake/1',
+                'KEY_PREFIX': 'yamdb',
+            },
+        }
+        create_titles(admin_client)
+        url = '/api/v1/titles/'
+        first = client.get(url)
+        assert first['X-Cache'] == 'MISS'
+        second, queries = get(client, url)
+        assert second['X-Cache'] == 'HIT' and not queries
+        assert second['ETag'] == first['ETag']
@@ -0,0 +1,132 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import (create_comments, create_single_comment,
+                         create_single_review, create_titles)
+from users.models import User
+
+
+def revalidate(client, url):
+    response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    etag = response.get('ETag')
+    assert etag, f'Проверьте, что ответ на GET-запрос к `{url}` содержит ETag.'
+    return etag
+
+
+def not_modified(client, url, etag):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    return (
+        response.status_code == HTTPStatus.NOT_MODIFIED,
+        len(context.captured_queries),
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15ETag:
+
+    def test_01_titles(self, admin_client, client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        etag = revalidate(client, url)
+        matched, queries = not_modified(client, url, etag)
+        assert matched, (
+            'Проверьте, что GET-запрос к `/api/v1/titles/{title_id}/` с '
+            'актуальным If-None-Match возвращает ответ со статусом 304.'
+        )
+        assert queries <= 1, (
+            'Проверьте, что ответ 304 на карточку произведения стоит не '
+            'больше одного запроса к БД - чтения его ревизии.'
+        )
+        assert not_modified(client, url, '"other"')[0] is False
+
+        create_single_review(user_client, titles[0]['id'], 'Хорошо', 8)
+        assert not_modified(client, url, etag)[0] is False, (
+            'Проверьте, что ETag меняется при изменении отзывов.'
+        )
+        list_etag = revalidate(client, '/api/v1/titles/')
+        assert not_modified(client, '/api/v1/titles/', list_etag)[0]
+
+    def test_02_reviews_and_comments(self, admin_client, admin, client,
+                                     user, user_client):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        comments_url = f'{reviews_url}{reviews[0]["id"]}/comments/'
+        reviews_etag = revalidate(client, reviews_url)
+        review_etag = revalidate(client, f'{reviews_url}{reviews[0]["id"]}/')
+        comments_etag = revalidate(client, comments_url)
+        assert not_modified(client, reviews_url, reviews_etag) == (True, 1)
+        assert not_modified(
+            client, f'{reviews_url}{reviews[0]["id"]}/', review_etag
+        )[0]
+        assert not_modified(client, comments_url, comments_etag)[0]
+
+        create_single_comment(
+            user_client, titles[0]['id'], reviews[0]['id'], 'Согласен'
+        )
+        assert not_modified(client, comments_url, comments_etag)[0] is False
+        assert not_modified(client, reviews_url, reviews_etag)[0] is False, (
+            'Проверьте, что новый комментарий меняет ETag отзывов: в них '
+            'выводится число комментариев.'
+        )
+
+    def test_03_deleted_parent(self, admin_client, client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        reviews_url = f'/api/v1/titles/{titles[1]["id"]}/reviews/'
+        reviews_etag = revalidate(client, reviews_url)
+        review_id = create_single_review(
+            user_client, titles[0]['id'], 'Хорошо', 8
+        ).json()['id']
+        comments_url = (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{review_id}/comments/'
+        )
+        comments_etag = revalidate(client, comments_url)
+
+        admin_client.delete(f'/api/v1/titles/{titles[1]["id"]}/')
+        response = client.get(reviews_url, HTTP_IF_NONE_MATCH=reviews_etag)
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что после удаления произведения его отзывы '
+            'не отвечают 304.'
+        )
+        user_client.delete(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{review_id}/'
+        )
+        response = client.get(comments_url, HTTP_IF_NONE_MATCH=comments_etag)
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что после удаления отзыва его комментарии '
+            'не отвечают 304.'
+        )
+
+    def test_04_unrelated_changes(self, admin_client, admin, client, user,
+                                  user_client):
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(user_client, titles[0]['id'], 'Хорошо', 8)
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        reviews_url = f'{title_url}reviews/'
+        title_etag = revalidate(client, title_url)
+        reviews_etag = revalidate(client, reviews_url)
+
+        create_single_review(admin_client, titles[1]['id'], 'Так себе', 4)
+        other = User.objects.create(username='other', email='o@yamdb.fake')
+        other.bio = 'Новая биография'
+        other.save()
+        user.confirmation_code = 'code'
+        user.save()
+        assert not_modified(client, title_url, title_etag)[0], (
+            'Проверьте, что ETag карточки произведения не меняется от '
+            'отзывов к другим произведениям и от правок пользователей '
+            'без смены username.'
+        )
+        assert not_modified(client, reviews_url, reviews_etag)[0]
+
+        user.username = 'renamed'
+        user.save()
+        assert not_modified(client, reviews_url, reviews_etag)[0] is False, (
+            'Проверьте, что смена username автора меняет ETag его отзывов.'
+        )
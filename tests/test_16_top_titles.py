@@ -0,0 +1,71 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16TopTitles:
+    url = '/api/v1/titles/top/'
+
+    def names(self, client, params=None):
+        response = client.get(self.url, params)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Эндпоинт `{self.url}` не найден или недоступен без токена.'
+        )
+        return [title['name'] for title in response.json()]
+
+    def test_01_top(self, admin_client, client, user_client, admin):
+        titles, _, _ = create_titles(admin_client)
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': 'Чужой',
+            'year': 1979,
+            'genre': ['horror', 'drama'],
+            'category': 'films',
+        })
+        alien_id = response.json()['id']
+        create_single_review(user_client, titles[0]['id'], 'Так себе', 4)
+        create_single_review(user_client, titles[1]['id'], 'Класс', 9)
+        create_single_review(user_client, alien_id, 'Жутко', 7)
+
+        assert self.names(client) == [
+            'Крепкий орешек', 'Чужой', 'Терминатор'
+        ], (
+            f'Проверьте, что `{self.url}` возвращает произведения по '
+            'убыванию рейтинга.'
+        )
+        assert self.names(client, {'genre': 'horror'}) == [
+            'Чужой', 'Терминатор'
+        ]
+        assert self.names(client, {'category': 'films'}) == [
+            'Чужой', 'Терминатор'
+        ]
+        assert self.names(
+            client, {'genre': 'drama', 'category': 'books'}
+        ) == ['Крепкий орешек']
+        assert self.names(client, {'limit': 1}) == ['Крепкий орешек']
+        response = client.get(self.url, {'limit': 0})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+        review_url = f'/api/v1/titles/{alien_id}/reviews/'
+        create_single_review(admin_client, alien_id, 'Шедевр', 10)
+        assert self.names(client, {'genre': 'horror'})[0] == 'Чужой'
+        admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/',
+            data={'genre': ['horror', 'drama']}
+        )
+        assert self.names(client, {'genre': 'drama'}) == [
+            'Крепкий орешек', 'Чужой', 'Терминатор'
+        ], (
+            'Проверьте, что рейтинг по жанру обновляется при добавлении '
+            'произведению нового жанра.'
+        )
+        review_id = client.get(review_url).json()['results'][0]['id']
+        admin_client.delete(f'{review_url}{review_id}/')
+        with CaptureQueriesContext(connection) as context:
+            names = self.names(client, {'genre': 'horror', 'limit': 2})
+        assert names == ['Чужой', 'Терминатор']
+        assert len(context.captured_queries) <= 3
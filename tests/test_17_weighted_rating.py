@@ -0,0 +1,74 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17WeightedRating:
+
+    def weighted(self, title_id):
+        from reviews.models import Title
+        return Title.objects.get(pk=title_id).weighted_rating
+
+    def test_01_weighted_rating(self, admin_client, client, user_client,
+                                moderator_client):
+        from reviews.models import RatingPrior
+        RatingPrior.objects.update_or_create(
+            pk=1, defaults={'mean': 5, 'min_votes': 2}
+        )
+        titles, _, _ = create_titles(admin_client)
+        first, second = titles[0]['id'], titles[1]['id']
+        assert self.weighted(first) is None
+
+        create_single_review(user_client, first, 'Отлично', 10)
+        create_single_review(moderator_client, first, 'Хорошо', 10)
+        create_single_review(user_client, second, 'Шедевр', 10)
+        assert self.weighted(first) == pytest.approx(7.5), (
+            'Проверьте, что взвешенный рейтинг считается как '
+            '(сумма + m * C) / (количество + m).'
+        )
+        assert self.weighted(second) == pytest.approx(20 / 3)
+
+        response = client.get('/api/v1/titles/', {'ordering': '-rating'})
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['results'][0]['rating'] == 10
+        response = client.get(
+            '/api/v1/titles/', {'ordering': '-weighted_rating'}
+        )
+        results = response.json()['results']
+        assert [title['id'] for title in results[:2]] == [first, second], (
+            'Проверьте, что произведения можно сортировать по '
+            '`weighted_rating`.'
+        )
+        assert results[0]['weighted_rating'] == pytest.approx(7.5)
+
+        url = f'/api/v1/titles/{first}/reviews/'
+        review_id = user_client.get(url).json()['results'][-1]['id']
+        user_client.patch(f'{url}{review_id}/', data={'score': 4})
+        assert self.weighted(first) == pytest.approx(6)
+        user_client.delete(f'{url}{review_id}/')
+        assert self.weighted(first) == pytest.approx(20 / 3)
+
+    def test_02_prior_change_recomputes(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_single_review(user_client, title_id, 'Хорошо', 8)
+
+        call_command(
+            'update_rating_prior_command', '--mean', '4', '--min-votes', '3',
+            stdout=StringIO(),
+        )
+        assert self.weighted(title_id) == pytest.approx(5), (
+            'Проверьте, что после смены априорных параметров взвешенный '
+            'рейтинг пересчитывается.'
+        )
+        call_command('update_rating_prior_command', stdout=StringIO())
+        assert self.weighted(title_id) == pytest.approx(8)
+
+        out = StringIO()
+        call_command('rebuild_ratings_command', '--check', stdout=out)
+        assert 'расхожден' not in out.getvalue().lower()
@@ -0,0 +1,64 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18ScoreHistogram:
+
+    def expected(self, **counts):
+        return {str(score): counts.get(f's{score}', 0)
+                for score in range(1, 11)}
+
+    def test_01_histogram(self, admin_client, client, user_client,
+                          moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        url = f'/api/v1/titles/{title_id}/reviews/stats/'
+
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Эндпоинт `{url}` не найден или недоступен без токена.'
+        )
+        assert response.json()['scores'] == self.expected()
+
+        create_single_review(user_client, title_id, 'Хорошо', 8)
+        create_single_review(moderator_client, title_id, 'Неплохо', 8)
+        review_id = create_single_review(
+            admin_client, title_id, 'Плохо', 2
+        ).json()['id']
+        with CaptureQueriesContext(connection) as context:
+            data = client.get(url).json()
+        assert len(context.captured_queries) == 1, (
+            'Проверьте, что статистика оценок читается одним запросом.'
+        )
+        assert data['count'] == 3
+        assert data['rating'] == 6
+        assert data['scores'] == self.expected(s2=1, s8=2), (
+            'Проверьте, что гистограмма оценок обновляется при создании '
+            'отзыва.'
+        )
+
+        review_url = f'/api/v1/titles/{title_id}/reviews/{review_id}/'
+        admin_client.patch(review_url, data={'score': 10})
+        response = client.get(f'/api/v1/titles/{title_id}/')
+        assert response.json()['scores'] == self.expected(s8=2, s10=1), (
+            'Проверьте, что гистограмма оценок выводится в карточке '
+            'произведения и обновляется при изменении оценки.'
+        )
+
+        admin_client.delete(review_url)
+        assert client.get(url).json()['scores'] == self.expected(s8=2), (
+            'Проверьте, что гистограмма оценок обновляется при удалении '
+            'отзыва.'
+        )
+        assert 'scores' not in client.get(
+            '/api/v1/titles/'
+        ).json()['results'][0]
+
+        response = client.get('/api/v1/titles/999999/reviews/stats/')
+        assert response.status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,92 @@
+import json
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_categories, create_genre
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19BulkTitles:
+    url = '/api/v1/titles/bulk/'
+
+    def post(self, client, data):
+        return client.post(
+            self.url, data=json.dumps(data), content_type='application/json'
+        )
+
+    def items(self, count, start=0):
+        return [
+            {
+                'name': f'Произведение {number}',
+                'year': 1990 + number % 30,
+                'genre': ['horror', 'comedy'][:number % 2 + 1],
+                'category': 'films',
+            }
+            for number in range(start, start + count)
+        ]
+
+    def test_01_bulk_create(self, admin_client, client, user_client):
+        create_categories(admin_client)
+        create_genre(admin_client)
+        items = self.items(3)
+        items.insert(1, {
+            'name': 'Без жанра', 'year': 2000,
+            'genre': ['unknown'], 'category': 'films',
+        })
+        items.append({'name': 'Из будущего', 'year': 3000,
+                      'genre': [], 'category': 'nowhere'})
+
+        response = self.post(user_client, items)
+        assert response.status_code == HTTPStatus.FORBIDDEN
+
+        response = self.post(admin_client, items)
+        assert response.status_code == HTTPStatus.CREATED, (
+            f'Проверьте, что POST-запрос администратора к `{self.url}` '
+            'создаёт корректные произведения и возвращает статус 201.'
+        )
+        data = response.json()
+        assert [item['index'] for item in data['created']] == [0, 2, 3]
+        errors = {item['index']: item['errors'] for item in data['errors']}
+        assert set(errors) == {1, 4}, (
+            'Проверьте, что ошибки возвращаются для каждого элемента '
+            'отдельно.'
+        )
+        assert 'genre' in errors[1]
+        assert {'year', 'category'} <= set(errors[4])
+
+        title_id = data['created'][1]['id']
+        title = client.get(f'/api/v1/titles/{title_id}/').json()
+        assert title['name'] == 'Произведение 1'
+        assert [genre['slug'] for genre in title['genre']] == [
+            'horror', 'comedy'
+        ], 'Проверьте, что произведения создаются вместе с жанрами.'
+        assert title['category']['slug'] == 'films'
+        response = client.get('/api/v1/titles/', {'search': 'Произведение'})
+        assert response.json()['count'] == 3, (
+            'Проверьте, что созданные пачкой произведения попадают в '
+            'поисковый индекс и в закешированный список.'
+        )
+
+        response = self.post(admin_client, items[4:])
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        response = self.post(admin_client, items[0])
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_02_constant_queries(self, admin_client):
+        create_categories(admin_client)
+        create_genre(admin_client)
+        # Первая загрузка заводит счётчик произведений, её не сравниваем.
+        self.post(admin_client, self.items(1, 1000))
+        counts = []
+        for start, count in ((0, 2), (100, 40)):
+            with CaptureQueriesContext(connection) as context:
+                response = self.post(admin_client, self.items(count, start))
+            assert response.status_code == HTTPStatus.CREATED
+            counts.append(len(context.captured_queries))
+        assert counts[0] == counts[1], (
+            'Проверьте, что число запросов пакетной загрузки не зависит '
+            'от количества произведений.'
+        )
@@ -0,0 +1,73 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_reviews, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20SparseFields:
+
+    def get(self, client, url, params):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, params)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что `{url}` принимает параметры {params}.'
+        )
+        return response.json(), context.captured_queries
+
+    def test_01_titles(self, admin_client, client):
+        titles, _, _ = create_titles(admin_client)
+        url = '/api/v1/titles/'
+
+        data, queries = self.get(client, url, {'fields': 'id,name,rating'})
+        assert set(data['results'][0]) == {'id', 'name', 'rating'}, (
+            'Проверьте, что параметр `fields` оставляет в ответе только '
+            'перечисленные поля.'
+        )
+        sql = ' '.join(query['sql'] for query in queries).lower()
+        assert 'reviews_genretitle' not in sql, (
+            'Проверьте, что без поля `genre` жанры не загружаются.'
+        )
+        assert 'description' not in sql
+        assert 'reviews_category' not in sql
+
+        data, _ = self.get(client, url, {'omit': 'description,genre'})
+        assert set(data['results'][0]) == {
+            'id', 'name', 'year', 'rating', 'weighted_rating',
+            'reviews_count', 'comments_count', 'category',
+        }
+        assert data['results'][0]['category']['slug']
+
+        detail_url = f'{url}{titles[0]["id"]}/'
+        data, _ = self.get(client, detail_url, {'fields': 'name,scores'})
+        assert set(data) == {'name', 'scores'}
+        full, _ = self.get(client, detail_url, {})
+        assert 'description' in full, (
+            'Проверьте, что без параметров ответ не меняется.'
+        )
+
+        response = client.get(url, {'fields': 'name,secret'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что неизвестные поля в `fields` отклоняются.'
+        )
+
+    def test_02_reviews(self, admin_client, admin, client):
+        _, titles = create_reviews(admin_client, {admin: admin_client})
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        data, queries = self.get(client, url, {'omit': 'text'})
+        assert 'text' not in data['results'][0]
+        assert set(data['results'][0]) == {
+            'id', 'author', 'score', 'pub_date', 'comments_count'
+        }
+        review_query = [
+            query['sql'] for query in queries
+            if 'FROM "reviews_review"' in query['sql']
+        ]
+        assert review_query and all(
+            '"reviews_review"."text"' not in sql for sql in review_query
+        ), 'Проверьте, что при `omit=text` текст отзыва не читается из БД.'
+        response = client.get(url, {'omit': 'rating'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
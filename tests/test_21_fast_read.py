@@ -0,0 +1,145 @@
+import random
+from http import HTTPStatus
+
+import pytest
+from rest_framework.renderers import JSONRenderer
+
+SEEDS = (1, 7, 42)
+ALPHABET = 'abcXYZ ёЖщ-ß ﬁ😀"\\\n'
+
+
+def random_text(rng, size=12):
+    return ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(1, size)))
+
+
+def render(data):
+    return JSONRenderer().render(data)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21FastRead:
+
+    def fill(self, rng):
+        from reviews.models import Category, Comment, Genres, Review, Title
+        from users.models import User
+        categories = [None] + [
+            Category.objects.create(
+                name=random_text(rng), slug=f'category-{number}'
+            )
+            for number in range(3)
+        ]
+        genres = [
+            Genres.objects.create(name=random_text(rng), slug=f'genre-{n}')
+            for n in range(5)
+        ]
+        users = [
+            User.objects.create(
+                username=f'user{number}', email=f'user{number}@yamdb.fake'
+            )
+            for number in range(4)
+        ]
+        for _ in range(15):
+            title = Title.objects.create(
+                name=random_text(rng, 40),
+                year=rng.randint(1000, 2020),
+                description=rng.choice([None, '', random_text(rng, 80)]),
+                category=rng.choice(categories),
+            )
+            title.genre.set(rng.sample(genres, rng.randint(0, 3)))
+            for user in rng.sample(users, rng.randint(0, len(users))):
+                review = Review.objects.create(
+                    title=title, author=user, text=random_text(rng, 60),
+                    score=rng.choice([None, *range(1, 11)]),
+                )
+                for _ in range(rng.randint(0, 2)):
+                    Comment.objects.create(
+                        title=title, review=review, author=rng.choice(users),
+                        text=random_text(rng, 30),
+                    )
+
+    def field_sets(self, rng, names):
+        yield None
+        for _ in range(5):
+            yield set(rng.sample(names, rng.randint(1, len(names))))
+
+    def check(self, rng, reader_class, queryset):
+        serializer_class = reader_class.serializer_class
+        for fields in self.field_sets(rng, serializer_class.Meta.fields):
+            serializer = serializer_class(queryset, many=True)
+            if fields is not None:
+                for name in list(serializer.child.fields):
+                    if name not in fields:
+                        serializer.child.fields.pop(name)
+            reader = reader_class(fields=fields)
+            assert render(reader.render(reader.prepare(queryset))) == (
+                render(serializer.data)
+            ), (
+                f'Проверьте, что {reader_class.__name__} выводит то же, '
+                f'что {serializer_class.__name__} (поля: {fields}).'
+            )
+
+    @pytest.mark.parametrize('seed', SEEDS)
+    def test_01_equivalence(self, seed):
+        from api.readers import (CommentReader, ReviewReader,
+                                 TitleDetailReader, TitleReader)
+        from api.serializers import GENRE_PREFETCH
+        from reviews.models import Comment, Review, Title
+        rng = random.Random(seed)
+        self.fill(rng)
+        titles = Title.objects.select_related('category').prefetch_related(
+            GENRE_PREFETCH
+        ).order_by('id')
+        self.check(rng, TitleReader, titles)
+        self.check(rng, TitleDetailReader, titles)
+        reviews = Review.objects.select_related('author').order_by('id')
+        self.check(rng, ReviewReader, reviews)
+        comments = Comment.objects.select_related('author').order_by('id')
+        self.check(rng, CommentReader, comments)
+
+    def test_02_row_permissions(self, admin, admin_client, user,
+                                user_client, monkeypatch):
+        from rest_framework.permissions import BasePermission
+
+        from api.views import ReviewViewSet
+        from reviews.models import Review
+        from tests.utils import create_reviews
+
+        checked = []
+
+        class AuthorOnly(BasePermission):
+            def has_object_permission(self, request, view, obj):
+                checked.append(obj)
+                return obj.author == request.user
+
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        monkeypatch.setattr(ReviewViewSet, 'permission_classes', [AuthorOnly])
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/{{}}/'
+        response = user_client.get(url.format(reviews[1]['id']))
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['text'] == reviews[1]['text']
+        assert user_client.get(
+            url.format(reviews[0]['id'])
+        ).status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что быстрое чтение проверяет права на экземпляре '
+            'модели, у которого есть `author`.'
+        )
+        assert all(isinstance(obj, Review) for obj in checked)
+
+    def test_03_unknown_field(self, admin_client):
+        from api.readers import TitleReader
+        from reviews.models import Title
+        from tests.utils import create_titles
+
+        class BrokenReader(TitleReader):
+            columns = {
+                name: column for name, column in TitleReader.columns.items()
+                if name != 'year'
+            }
+
+        create_titles(admin_client)
+        reader = BrokenReader()
+        rows = list(reader.prepare(Title.objects.all()))
+        with pytest.raises(KeyError, match='year'):
+            reader.render(rows)
@@ -0,0 +1,77 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22GenreFilter:
+    url = '/api/v1/titles/'
+
+    def names(self, client, params):
+        response = client.get(self.url, params)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что `{self.url}` принимает параметры {params}.'
+        )
+        return sorted(title['name'] for title in response.json()['results'])
+
+    def test_01_multi_value(self, admin_client, client):
+        create_titles(admin_client)
+        admin_client.post(self.url, data={
+            'name': 'Чужой', 'year': 1979,
+            'genre': ['horror', 'drama'], 'category': 'films',
+        })
+        assert self.names(client, {'genre': 'drama,comedy'}) == [
+            'Крепкий орешек', 'Терминатор', 'Чужой'
+        ], (
+            'Проверьте, что `genre` принимает несколько слагов через '
+            'запятую и по умолчанию ищет любой из жанров.'
+        )
+        assert self.names(
+            client, {'genre': 'horror,drama', 'genre_match': 'all'}
+        ) == ['Чужой'], (
+            'Проверьте, что `genre_match=all` требует все перечисленные '
+            'жанры.'
+        )
+        assert self.names(client, {'genre': 'horror'}) == [
+            'Терминатор', 'Чужой'
+        ]
+        response = client.get(self.url, {'genre_match': 'some'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+        assert self.names(client, {'year_from': 1980}) == [
+            'Крепкий орешек', 'Терминатор'
+        ]
+        assert self.names(
+            client, {'year_from': 1979, 'year_to': 1985}
+        ) == ['Терминатор', 'Чужой'], (
+            'Проверьте, что произведения фильтруются по диапазону лет '
+            '`year_from`/`year_to`.'
+        )
+
+        response = client.get(
+            self.url, {'genre': 'horror,drama', 'search': 'Чужой'}
+        )
+        assert response.json()['count'] == 1, (
+            'Проверьте, что фильтр по нескольким жанрам не размножает '
+            'произведения.'
+        )
+
+    def test_02_exists_uses_index(self):
+        from api.filter import GenreFilter
+        from reviews.models import Title
+        queryset = GenreFilter(
+            {'genre': 'horror,drama', 'genre_match': 'all'},
+            queryset=Title.objects.all(),
+        ).qs
+        sql, params = queryset.query.sql_with_params()
+        assert 'EXISTS' in sql
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        assert 'SCAN reviews_genretitle' not in plan.replace('"', ''), (
+            'Проверьте, что подзапрос EXISTS по жанрам использует индекс '
+            f'GenreTitle, а не полный просмотр таблицы: {plan}'
+        )
@@ -0,0 +1,110 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_comments, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23Counts:
+
+    def get(self, client, url, params=None):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, params)
+        assert response.status_code == HTTPStatus.OK
+        return response.json(), [
+            query['sql'] for query in context.captured_queries
+        ]
+
+    def test_01_maintained_counts(self, admin_client, admin, client,
+                                  user, user_client):
+        authors = {admin: admin_client, user: user_client}
+        comments, reviews, titles = create_comments(admin_client, authors)
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        reviews_url = f'{title_url}reviews/'
+        comments_url = f'{reviews_url}{reviews[0]["id"]}/comments/'
+
+        data, queries = self.get(client, '/api/v1/titles/')
+        assert (data['count'], data['count_exact']) == (2, True)
+        assert not any(
+            'COUNT(' in sql and 'reviews_title' in sql for sql in queries
+        ), (
+            'Проверьте, что количество произведений без фильтров берётся '
+            'из счётчика, а не из COUNT(*).'
+        )
+        data, queries = self.get(client, reviews_url)
+        assert (data['count'], data['count_exact']) == (2, True)
+        assert not any('COUNT(' in sql for sql in queries), (
+            'Проверьте, что количество отзывов к произведению берётся из '
+            'поддерживаемого счётчика.'
+        )
+        data, queries = self.get(client, comments_url)
+        assert (data['count'], data['count_exact']) == (2, True)
+        assert not any('COUNT(' in sql for sql in queries)
+
+        user_client.delete(f'{comments_url}{comments[1]["id"]}/')
+        assert self.get(client, comments_url)[0]['count'] == 1
+        admin_client.delete(f'{reviews_url}{reviews[0]["id"]}/')
+        assert self.get(client, reviews_url)[0]['count'] == 1, (
+            'Проверьте, что счётчик отзывов уменьшается при удалении отзыва.'
+        )
+        user.delete()
+        assert self.get(client, reviews_url)[0]['count'] == 0
+        admin_client.delete(title_url)
+        assert self.get(client, '/api/v1/titles/')[0]['count'] == 1
+
+        from reviews.models import Counter
+        Counter.objects.all().delete()
+        assert self.get(client, '/api/v1/titles/')[0]['count'] == 1, (
+            'Проверьте, что пропавший счётчик заводится заново.'
+        )
+
+    def test_02_bounded_count(self, admin_client, client, monkeypatch):
+        from api.pagination import TitlePagination
+        create_titles(admin_client)
+        admin_client.post('/api/v1/titles/', data={
+            'name': 'Чужой', 'year': 1979,
+            'genre': ['horror'], 'category': 'films',
+        })
+        monkeypatch.setattr(TitlePagination, 'count_limit', 2)
+
+        data, _ = self.get(
+            client, '/api/v1/titles/', {'year_to': 1990, 'limit': 1}
+        )
+        assert (data['count'], data['count_exact']) == (2, False), (
+            'Проверьте, что для отфильтрованной выборки количество '
+            'ограничено и помечено как неточное.'
+        )
+        assert data['next'] and len(data['results']) == 1
+        data, _ = self.get(
+            client, '/api/v1/titles/',
+            {'year_to': 1990, 'limit': 1, 'offset': 2}
+        )
+        assert data['next'] is None
+        assert data['count_exact'] is True
+        data, _ = self.get(client, '/api/v1/titles/', {'year_to': 1990})
+        assert (data['count'], data['count_exact']) == (3, True)
+        data, _ = self.get(client, '/api/v1/titles/', {'year_to': 1980})
+        assert (data['count'], data['count_exact']) == (1, True)
+
+    def test_03_atomic_title(self, monkeypatch):
+        from reviews import signals
+        from reviews.counters import TITLES, get_counter
+        from reviews.models import Title
+        before = get_counter(TITLES)
+        change_counter = signals.change_counter
+
+        def fail_after_counter(name, delta):
+            change_counter(name, delta)
+            raise RuntimeError
+
+        monkeypatch.setattr(signals, 'change_counter', fail_after_counter)
+        with pytest.raises(RuntimeError):
+            Title.objects.create(name='Чужой', year=1979)
+        assert not Title.objects.filter(name='Чужой').exists(), (
+            'Проверьте, что произведение и счётчик произведений '
+            'сохраняются в одной транзакции.'
+        )
+        assert get_counter(TITLES) == before
@@ -0,0 +1,102 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_comments, create_single_comment
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24TitleExpand:
+
+    def test_01_expand(self, admin_client, admin, client, user,
+                       user_client, moderator, moderator_client):
+        from api.views import TitlesViewSet
+        authors = {
+            admin: admin_client, user: user_client,
+            moderator: moderator_client,
+        }
+        comments, reviews, titles = create_comments(admin_client, authors)
+        title_id = titles[0]['id']
+        url = f'/api/v1/titles/{title_id}/'
+        for number in range(TitlesViewSet.expand_comments_limit):
+            create_single_comment(
+                user_client, title_id, reviews[0]['id'], f'ещё {number}'
+            )
+
+        plain = client.get(url).json()
+        assert 'reviews' not in plain
+
+        response = client.get(url, {'expand': 'reviews'})
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        page = client.get(f'{url}reviews/').json()
+        assert data['reviews'] == {
+            'count': page['count'], 'results': page['results'],
+        }, (
+            'Проверьте, что `?expand=reviews` добавляет к произведению '
+            'первую страницу его отзывов.'
+        )
+        assert {key: data[key] for key in plain} == plain
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(
+                url, {'expand': 'reviews,reviews.comments'}
+            )
+        assert response.status_code == HTTPStatus.OK
+        assert len(context.captured_queries) == 4, (
+            'Проверьте, что карточка с отзывами и комментариями читается '
+            'фиксированным числом запросов.'
+        )
+        expanded = {
+            review['id']: review['comments']
+            for review in response.json()['reviews']['results']
+        }
+        comments_url = f'{url}reviews/{reviews[0]["id"]}/comments/'
+        first_comments = client.get(
+            comments_url, {'limit': TitlesViewSet.expand_comments_limit}
+        ).json()
+        assert expanded[reviews[0]['id']] == {
+            'count': len(comments) + TitlesViewSet.expand_comments_limit,
+            'results': first_comments['results'],
+        }, (
+            'Проверьте, что к отзывам добавляются их первые комментарии.'
+        )
+        assert expanded[reviews[1]['id']] == {'count': 0, 'results': []}
+
+        response = client.get(url, {'expand': 'comments'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        response = client.get(
+            '/api/v1/titles/999999/', {'expand': 'reviews'}
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_02_authors_in_cache_key(self, admin_client, admin, client,
+                                     user, user_client):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        plain = client.get(url)
+        expanded = client.get(url, {'expand': 'reviews'})
+
+        user.username = 'renamed'
+        user.save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=plain['ETag'])
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что смена username не меняет ETag карточки '
+            'произведения без `?expand=`.'
+        )
+        assert client.get(url)['X-Cache'] == 'HIT'
+        response = client.get(
+            url, {'expand': 'reviews'}, HTTP_IF_NONE_MATCH=expanded['ETag']
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert response['X-Cache'] == 'MISS'
+        assert 'renamed' in {
+            review['author'] for review in response.json()['reviews']['results']
+        }, (
+            'Проверьте, что карточка с `?expand=reviews` показывает новые '
+            'имена авторов.'
+        )
@@ -0,0 +1,181 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.similarity import TOP_K
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25SimilarTitles:
+
+    def create_title(self, admin_client, name, genre, category):
+        data = {
+            'name': name, 'year': 2000, 'genre': genre, 'category': category,
+        }
+        response = admin_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == HTTPStatus.CREATED
+        return response.json()['id']
+
+    def similar(self, client, title_id, **params):
+        response = client.get(f'/api/v1/titles/{title_id}/similar/', params)
+        assert response.status_code == HTTPStatus.OK, (
+            'Эндпоинт `/api/v1/titles/{title_id}/similar/` не найден или '
+            'недоступен без токена.'
+        )
+        return [(item['id'], item['similarity']) for item in response.json()]
+
+    def test_01_similar(self, admin_client, client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        terminator, die_hard = titles[0]['id'], titles[1]['id']
+        alien = self.create_title(admin_client, 'Чужой', ['horror'], 'films')
+        mask = self.create_title(admin_client, 'Маска', ['comedy'], 'films')
+        war = self.create_title(
+            admin_client, 'Война и мир', ['drama'], 'books'
+        )
+        create_single_review(user_client, mask, 'Смешно', 9)
+
+        out = StringIO()
+        call_command('build_similar_titles_command', stdout=out)
+        assert '8' in out.getvalue()
+
+        assert self.similar(client, terminator) == [
+            (mask, pytest.approx(2 / 3)), (alien, pytest.approx(2 / 3)),
+        ], (
+            'Проверьте, что похожие упорядочены по сходству, а при равном '
+            'сходстве - по взвешенному рейтингу.'
+        )
+        assert self.similar(client, die_hard) == [(war, 1)]
+        assert self.similar(client, alien) == [
+            (terminator, pytest.approx(2 / 3)), (mask, pytest.approx(1 / 3)),
+        ]
+
+        response = client.get(
+            f'/api/v1/titles/{terminator}/similar/', {'fields': 'id,name'}
+        )
+        assert response.json()[0] == {
+            'id': mask, 'name': 'Маска', 'similarity': pytest.approx(2 / 3),
+        }
+
+        call_command(
+            'build_similar_titles_command', '--top', '1', stdout=StringIO()
+        )
+        assert self.similar(client, terminator) == [
+            (mask, pytest.approx(2 / 3)),
+        ]
+
+    def test_02_incremental_update(self, admin_client, client):
+        titles, _, _ = create_titles(admin_client)
+        terminator, die_hard = titles[0]['id'], titles[1]['id']
+        war = self.create_title(
+            admin_client, 'Война и мир', ['drama'], 'books'
+        )
+        call_command('build_similar_titles_command', stdout=StringIO())
+        assert self.similar(client, war) == [(die_hard, 1)]
+
+        response = admin_client.patch(
+            f'/api/v1/titles/{die_hard}/',
+            data={'genre': ['horror', 'comedy'], 'category': 'films'},
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert self.similar(client, die_hard) == [(terminator, 1)], (
+            'Проверьте, что после смены жанров и категории список похожих '
+            'произведения пересчитывается.'
+        )
+        assert self.similar(client, war) == [], (
+            'Проверьте, что произведение без общих признаков сразу '
+            'убирается из чужих списков похожих.'
+        )
+        assert self.similar(client, terminator) == [(die_hard, 1)], (
+            'Проверьте, что произведение сразу попадает в списки похожих '
+            'тех, с кем у него появились общие признаки.'
+        )
+        alien = self.create_title(admin_client, 'Чужой', ['horror'], 'films')
+        assert self.similar(client, terminator) == [
+            (die_hard, 1), (alien, pytest.approx(2 / 3)),
+        ]
+
+        call_command('build_similar_titles_command', stdout=StringIO())
+        assert self.similar(client, war) == []
+        assert self.similar(client, terminator) == [
+            (die_hard, 1), (alien, pytest.approx(2 / 3)),
+        ]
+
+    def test_03_name_only_update(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        with CaptureQueriesContext(connection) as queries:
+            response = admin_client.patch(url, data={'name': 'Терминатор 2'})
+        assert response.status_code == HTTPStatus.OK
+        assert not [
+            query for query in queries.captured_queries
+            if 'reviews_similartitle' in query['sql']
+        ], (
+            'Проверьте, что похожие пересчитываются только при смене '
+            'категории или жанров.'
+        )
+
+    def test_04_not_found(self, client):
+        response = client.get('/api/v1/titles/999/similar/')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    @pytest.mark.parametrize('seed', range(3))
+    def test_05_incremental_matches_rebuild(self, seed):
+        import random
+
+        from reviews.models import Category, Genres, SimilarTitle, Title
+        from reviews.similarity import _similar_rows, rebuild_similar_titles
+
+        def stored():
+            return sorted(
+                (title_id, rank, similar_id, round(score, 9))
+                for title_id, rank, similar_id, score
+                in SimilarTitle.objects.values_list(
+                    'title_id', 'rank', 'similar_id', 'score'
+                )
+            )
+
+        def expected():
+            return sorted(
+                (row.title_id, row.rank, row.similar_id, round(row.score, 9))
+                for row in _similar_rows(TOP_K)
+            )
+
+        rng = random.Random(seed)
+        categories = [
+            Category.objects.create(name=slug, slug=slug)
+            for slug in ('films', 'books')
+        ]
+        genres = [
+            Genres.objects.create(name=slug, slug=slug)
+            for slug in ('horror', 'comedy', 'drama', 'fantasy')
+        ]
+
+        def create_title(number):
+            title = Title.objects.create(
+                name=f'Произведение {number}', year=2000,
+                category=rng.choice([*categories, None]),
+            )
+            title.genre.set(rng.sample(genres, rng.randint(0, 2)))
+            return title
+
+        titles = [create_title(number) for number in range(30)]
+        rebuild_similar_titles()
+        for step in range(30):
+            action = rng.random()
+            title = rng.choice(titles)
+            if action < 0.4:
+                title.genre.set(rng.sample(genres, rng.randint(0, 3)))
+            elif action < 0.8:
+                title.category = rng.choice([*categories, None])
+                title.save()
+            else:
+                titles.append(create_title(len(titles)))
+            assert stored() == expected(), (
+                'Проверьте, что после правки произведения списки похожих '
+                'совпадают с полным пересчётом.'
+            )
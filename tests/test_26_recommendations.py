@@ -0,0 +1,86 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_many_titles
+
+URL = '/api/v1/users/me/recommendations/'
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26Recommendations:
+
+    def rate(self, author, titles, scores):
+        from reviews.models import Review
+        for index, score in scores.items():
+            Review.objects.create(
+                author=author, title=titles[index], text='Отзыв', score=score
+            )
+
+    def recommended(self, client):
+        response = client.get(URL)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Эндпоинт `{URL}` не найден или недоступен пользователю.'
+        )
+        return [
+            (item['id'], item['predicted_score']) for item in response.json()
+        ]
+
+    def test_01_recommendations(self, client, admin, user, moderator,
+                                user_client, moderator_client):
+        titles = create_many_titles(4)
+        self.rate(admin, titles, {0: 10, 1: 9, 2: 2, 3: 3})
+        self.rate(moderator, titles, {0: 9, 1: 10, 2: 1, 3: 2})
+        self.rate(user, titles, {0: 10, 2: 2})
+
+        assert client.get(URL).status_code == HTTPStatus.UNAUTHORIZED
+        assert self.recommended(user_client) == []
+
+        out = StringIO()
+        call_command('build_recommendations_command', stdout=out)
+        assert 'Сохранено рекомендаций: 2' in out.getvalue()
+
+        recommended = self.recommended(user_client)
+        assert [title_id for title_id, _ in recommended] == [
+            titles[1].pk, titles[3].pk,
+        ], (
+            'Проверьте, что пользователю рекомендуются неоценённые им '
+            'произведения, похожие на высоко оценённые.'
+        )
+        assert all(1 <= score <= 10 for _, score in recommended)
+        assert self.recommended(moderator_client) == []
+
+        call_command(
+            'build_recommendations_command', '--block-size', '1',
+            '--chunk-size', '2', stdout=StringIO(),
+        )
+        assert self.recommended(user_client) == recommended, (
+            'Проверьте, что результат не зависит от размера блока и '
+            'пачки чтения.'
+        )
+        call_command(
+            'build_recommendations_command', '--memory-mb', '0',
+            stdout=StringIO(),
+        )
+        assert self.recommended(user_client) == recommended, (
+            'Проверьте, что результат не зависит от бюджета памяти.'
+        )
+
+        self.rate(user, titles, {1: 8})
+        assert [title_id for title_id, _ in self.recommended(user_client)] == [
+            titles[3].pk,
+        ], 'Проверьте, что оценённые произведения не рекомендуются.'
+
+    def test_02_top(self, admin, user, moderator, user_client):
+        titles = create_many_titles(4)
+        self.rate(admin, titles, {0: 10, 1: 9, 2: 2, 3: 3})
+        self.rate(moderator, titles, {0: 9, 1: 10, 2: 1, 3: 2})
+        self.rate(user, titles, {0: 10, 2: 2})
+        call_command(
+            'build_recommendations_command', '--top', '1', stdout=StringIO()
+        )
+        assert [
+            title_id for title_id, _ in self.recommended(user_client)
+        ] == [titles[1].pk]
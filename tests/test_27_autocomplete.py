@@ -0,0 +1,209 @@
+import time
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_single_review, create_titles
+
+URL = '/api/v1/titles/autocomplete/'
+
+
+@pytest.fixture(autouse=True)
+def fresh_index(monkeypatch):
+    from api import autocomplete
+    monkeypatch.setitem(autocomplete._state, 'index', None)
+    yield
+    thread = autocomplete._worker['thread']
+    if thread is not None:
+        thread.join()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27Autocomplete:
+
+    def names(self, client, query, **params):
+        response = client.get(URL, {'q': query, **params})
+        assert response.status_code == HTTPStatus.OK, (
+            f'Эндпоинт `{URL}` не найден или недоступен без токена.'
+        )
+        return [item['name'] for item in response.json()]
+
+    def test_01_autocomplete(self, admin_client, client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        assert self.names(client, 'тЕр') == ['Терминатор'], (
+            'Проверьте, что подсказки ищут по началу названия без учёта '
+            'регистра.'
+        )
+        assert self.names(client, 'ОРЕШ') == ['Крепкий орешек'], (
+            'Проверьте, что подсказки находят начало любого слова.'
+        )
+        assert self.names(client, 'реш') == []
+        assert client.get(URL).status_code == HTTPStatus.BAD_REQUEST
+
+        with CaptureQueriesContext(connection) as context:
+            self.names(client, 'крепкий ор')
+        assert not context.captured_queries, (
+            'Проверьте, что подсказки отвечают из памяти, без запросов к БД.'
+        )
+
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': 'Крик', 'year': 1996, 'genre': ['horror'],
+            'category': 'films',
+        })
+        assert response.status_code == HTTPStatus.CREATED
+        scream_id = response.json()['id']
+        assert self.names(client, 'кр') == ['Крепкий орешек', 'Крик'], (
+            'Проверьте, что новое произведение попадает в подсказки.'
+        )
+        create_single_review(user_client, scream_id, 'Страшно', 9)
+        admin_client.patch(
+            f'/api/v1/titles/{scream_id}/', data={'name': 'Крик 2'}
+        )
+        assert self.names(client, 'кр') == ['Крик 2', 'Крепкий орешек'], (
+            'Проверьте, что подсказки упорядочены по рейтингу.'
+        )
+        assert self.names(client, 'кр', limit=1) == ['Крик 2']
+
+        admin_client.delete(f'/api/v1/titles/{titles[1]["id"]}/')
+        assert self.names(client, 'кр') == ['Крик 2']
+
+    def test_02_incremental_update(self, admin_client, client):
+        from api import autocomplete
+        titles, _, _ = create_titles(admin_client)
+        assert self.names(client, 'кр') == ['Крепкий орешек']
+        index = autocomplete._state['index']
+
+        admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/', data={'name': 'Кролик'}
+        )
+        with CaptureQueriesContext(connection) as context:
+            assert self.names(client, 'кр') == ['Кролик', 'Крепкий орешек']
+            assert self.names(client, 'тер') == []
+        assert not context.captured_queries
+        admin_client.delete(f'/api/v1/titles/{titles[1]["id"]}/')
+        assert self.names(client, 'кр') == ['Кролик']
+        assert autocomplete._state['index'] is index, (
+            'Проверьте, что сохранение и удаление произведения обновляют '
+            'индекс подсказок, а не перестраивают его.'
+        )
+        assert autocomplete._worker['thread'] is None
+
+    def test_03_background_rebuild(self, admin_client, client):
+        from api import autocomplete
+        from api.cache import bump_version
+        from reviews.models import Title
+        titles, _, _ = create_titles(admin_client)
+        assert self.names(client, 'кр') == ['Крепкий орешек']
+
+        # Изменение из другого процесса: сигналы здесь не срабатывают.
+        Title.objects.filter(pk=titles[1]['id']).update(name='Кролик')
+        bump_version(Title)
+        with CaptureQueriesContext(connection) as context:
+            assert self.names(client, 'кр') == ['Крепкий орешек'], (
+                'Проверьте, что до конца фоновой пересборки подсказки '
+                'отдаёт прежний индекс.'
+            )
+        assert not context.captured_queries
+        autocomplete._worker['thread'].join()
+        assert self.names(client, 'кр') == ['Кролик']
+
+    def test_04_popularity_refresh(self, admin_client, client, user_client,
+                                   monkeypatch):
+        from api import autocomplete
+        titles, _, _ = create_titles(admin_client)
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': 'Крик', 'year': 1996, 'genre': ['horror'],
+            'category': 'films',
+        })
+        scream_id = response.json()['id']
+        assert self.names(client, 'кр') == ['Крепкий орешек', 'Крик']
+
+        # Отзыв меняет рейтинг без сохранения произведения.
+        create_single_review(user_client, scream_id, 'Страшно', 9)
+        assert self.names(client, 'кр') == ['Крепкий орешек', 'Крик']
+        monkeypatch.setitem(autocomplete._state, 'refreshed', 0)
+        self.names(client, 'кр')
+        autocomplete._worker['thread'].join()
+        assert self.names(client, 'кр') == ['Крик', 'Крепкий орешек'], (
+            'Проверьте, что порядок подсказок по рейтингу обновляется '
+            'в фоне.'
+        )
+
+    def test_05_speed(self):
+        from api.autocomplete import TitleIndex
+        words = ['альфа', 'бета', 'гамма', 'дельта', 'эпсилон', 'зета']
+        index = TitleIndex(
+            (
+                pk, f'{words[pk % 6]} {words[pk // 6 % 6]} {pk}', 2000,
+                pk % 10 or None, pk % 7,
+            )
+            for pk in range(1, 20001)
+        )
+        queries = ['а', 'бе', 'гам', 'дельта з', 'эпсилон альфа 1', 'зета']
+        for pk in range(1, 20001, 100):
+            index.update(pk, f'{words[pk % 6]} омега {pk}', 2000, 5, 1)
+        index.remove(2)
+        started = time.perf_counter()
+        for _ in range(100):
+            for query in queries:
+                index.search(query, 10)
+        elapsed = (time.perf_counter() - started) / (100 * len(queries))
+        assert elapsed < 0.001, (
+            'Проверьте, что подсказка по индексу занимает меньше '
+            'миллисекунды.'
+        )
+
+    @pytest.mark.parametrize('max_scan', [1000, 5])
+    def test_06_matches_full_scan(self, monkeypatch, max_scan):
+        import random
+
+        from api import autocomplete
+        from api.autocomplete import TitleIndex, _word_suffixes
+        monkeypatch.setattr(autocomplete, 'MAX_SCAN', max_scan)
+        rng = random.Random(max_scan)
+        words = ['альфа', 'альт', 'бета', 'бег', 'гамма']
+
+        def name():
+            return ' '.join(rng.choices(words, k=rng.randint(1, 3)))
+
+        def popularity():
+            return rng.choice([None, 5.0, 7.5]), rng.randint(0, 3)
+
+        index = TitleIndex(
+            (pk, name(), 2000, *popularity()) for pk in range(1, 201)
+        )
+        for _ in range(100):
+            pk = rng.randint(1, 250)
+            if rng.random() < 0.2:
+                index.remove(pk)
+            else:
+                index.update(pk, name(), 2000, *popularity())
+        for query in ('аль', 'альфа', 'альфа а', 'бе', 'бет', 'гамма б'):
+            matches = sorted(
+                (
+                    pk for pk, title in index.titles.items()
+                    if any(
+                        key.startswith(query)
+                        for key in _word_suffixes(title['name'])
+                    )
+                ),
+                key=index.popularity.__getitem__,
+            )
+            found = [title['id'] for title in index.search(query, 10)]
+            assert len(found) == min(10, len(matches))
+            assert set(found) <= set(matches)
+            assert found == sorted(found, key=index.popularity.__getitem__)
+            short = index.precomputed.get(
+                query[:autocomplete.PRECOMPUTED_LENGTH], []
+            )
+            exact = 0
+            while exact < len(found) and matches[exact] in short:
+                exact += 1
+            if len(matches) <= max_scan:
+                exact = len(found)
+            assert found[:exact] == matches[:exact], (
+                'Проверьте, что подсказки по длинному префиксу совпадают '
+                'с полным просмотром совпадений.'
+            )
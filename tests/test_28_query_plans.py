@@ -0,0 +1,64 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_comments, create_single_comment
+
+
+@pytest.mark.django_db(transaction=True)
+class Test28QueryPlans:
+
+    def plans(self, client, url, params=None):
+        """Планы всех SELECT, выполненных при запросе к `url`."""
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, params or {})
+        assert response.status_code == 200, response.content
+        plans = []
+        with connection.cursor() as cursor:
+            for query in context.captured_queries:
+                sql = query['sql']
+                if not sql.startswith('SELECT'):
+                    continue
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plan = ' | '.join(str(row[-1]) for row in cursor.fetchall())
+                plans.append((sql, plan.replace('"', '')))
+        return response.json(), plans
+
+    def check(self, client, url, params=None):
+        data, plans = self.plans(client, url, params)
+        for sql, plan in plans:
+            assert 'TEMP B-TREE' not in plan, (
+                f'Запрос сортирует строки во временном дереве: {sql}\n{plan}'
+            )
+            for table in ('reviews_review', 'reviews_comment'):
+                assert f'SCAN {table}' not in plan, (
+                    f'Запрос читает таблицу `{table}` целиком: {sql}\n{plan}'
+                )
+        return data
+
+    def test_01_list_plans(self, admin_client, client, admin, user,
+                           user_client, moderator, moderator_client):
+        authors = {
+            admin: admin_client, user: user_client,
+            moderator: moderator_client,
+        }
+        _, reviews, titles = create_comments(admin_client, authors)
+        title_id = titles[0]['id']
+        review_id = reviews[0]['id']
+        for number in range(3):
+            create_single_comment(
+                user_client, title_id, review_id, f'Ещё {number}'
+            )
+        reviews_url = f'/api/v1/titles/{title_id}/reviews/'
+        comments_url = f'{reviews_url}{review_id}/comments/'
+
+        for url in (reviews_url, comments_url):
+            self.check(client, url)
+            # Лишний параметр включает подсчёт строк вместо счётчика.
+            self.check(client, url, {'search': 'x'})
+            page = self.check(client, url, {'cursor': '', 'limit': 1})
+            self.check(client, page['next'])
+        self.check(
+            client, f'/api/v1/titles/{title_id}/',
+            {'expand': 'reviews,reviews.comments'},
+        )
@@ -0,0 +1,70 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_comments
+
+
+@pytest.mark.django_db(transaction=True)
+class Test29NestedRoutes:
+
+    def test_01_mismatched_path(self, admin_client, client, admin, user,
+                                user_client, moderator, moderator_client):
+        from reviews.models import Comment
+        authors = {
+            admin: admin_client, user: user_client,
+            moderator: moderator_client,
+        }
+        comments, reviews, titles = create_comments(admin_client, authors)
+        other_title_id = titles[1]['id']
+        review_id = reviews[0]['id']
+        comments_count = Comment.objects.count()
+        url = f'/api/v1/titles/{other_title_id}/reviews/{review_id}/'
+        comment_url = f'{url}comments/{comments[0]["id"]}/'
+
+        for response in (
+            client.get(f'{url}comments/'),
+            client.get(comment_url),
+            user_client.post(f'{url}comments/', data={'text': 'Мимо'}),
+            admin_client.patch(comment_url, data={'text': 'Мимо'}),
+            admin_client.delete(comment_url),
+        ):
+            assert response.status_code == HTTPStatus.NOT_FOUND, (
+                'Проверьте, что отзыв из URL должен принадлежать '
+                'произведению из URL, иначе возвращается 404.'
+            )
+        assert Comment.objects.count() == comments_count
+
+        response = client.get('/api/v1/titles/999/reviews/')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_02_route_queries(self, admin_client, admin, user, user_client,
+                              moderator, moderator_client):
+        authors = {
+            admin: admin_client, user: user_client,
+            moderator: moderator_client,
+        }
+        _, reviews, titles = create_comments(admin_client, authors)
+        url = (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+            f'{reviews[0]["id"]}/comments/'
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(url, data={'text': 'Согласен'})
+        assert response.status_code == HTTPStatus.CREATED
+        selects = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'users_user' not in query['sql']
+        ]
+        assert len(selects) == 1, (
+            'Проверьте, что произведение и отзыв из URL проверяются '
+            'одним запросом.'
+        )
+        from reviews.models import Comment
+        comment = Comment.objects.get(pk=response.json()['id'])
+        assert (comment.title_id, comment.review_id) == (
+            titles[0]['id'], reviews[0]['id']
+        )
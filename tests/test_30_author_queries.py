@@ -0,0 +1,59 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_comments, create_single_comment
+
+
+@pytest.mark.django_db(transaction=True)
+class Test30AuthorQueries:
+
+    def queries(self, client, method, url, **kwargs):
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(client, method)(url, **kwargs)
+        assert response.status_code == HTTPStatus.OK, response.content
+        return [query['sql'] for query in context.captured_queries]
+
+    def test_01_constant_queries(self, admin_client, client, admin, user,
+                                 user_client, moderator, moderator_client):
+        authors = {
+            admin: admin_client, user: user_client,
+            moderator: moderator_client,
+        }
+        _, reviews, titles = create_comments(admin_client, authors)
+        title_id = titles[0]['id']
+        review_id = reviews[0]['id']
+        reviews_url = f'/api/v1/titles/{title_id}/reviews/'
+        comments_url = f'{reviews_url}{review_id}/comments/'
+
+        for url in (reviews_url, comments_url):
+            short = self.queries(client, 'get', url, data={'limit': 1})
+            full = self.queries(client, 'get', url, data={'limit': 100})
+            assert len(short) == len(full) == 2, (
+                f'Проверьте, что страница `{url}` читается постоянным '
+                'числом запросов вместе с авторами.'
+            )
+        for author_client in authors.values():
+            create_single_comment(author_client, title_id, review_id, 'Ещё')
+        assert len(self.queries(client, 'get', comments_url)) == 2
+
+        comment_id = client.get(comments_url).json()['results'][0]['id']
+        detail_urls = (
+            f'{reviews_url}{review_id}/', f'{comments_url}{comment_id}/',
+        )
+        for url in detail_urls:
+            assert len(self.queries(client, 'get', url)) == 2
+            updated = self.queries(
+                admin_client, 'patch', url, data={'text': 'Исправлено'}
+            )
+            user_rows = [sql for sql in updated if 'users_user' in sql]
+            # Первый запрос - пользователь из токена.
+            assert len(user_rows) == 2, (
+                'Проверьте, что автор читается тем же запросом, что и '
+                'объект.'
+            )
+            assert '"users_user"."password"' not in user_rows[1], (
+                'Проверьте, что из строки автора читается только username.'
+            )
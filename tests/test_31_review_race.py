@@ -0,0 +1,82 @@
+import threading
+from http import HTTPStatus
+
+import pytest
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_titles
+
+THREADS = 8
+
+
+@pytest.mark.django_db(transaction=True)
+class Test31ReviewRace:
+
+    def test_01_duplicate_message(self, admin_client, user_client):
+        from reviews.models import Review
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        data = {'text': 'Отзыв', 'score': 7}
+        assert user_client.post(url, data=data).status_code == (
+            HTTPStatus.CREATED
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(url, data=data)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert response.json() == {'non_field_errors': [
+            'Вы уже оставили отзыв к этому произведению.'
+        ]}
+        queries = [query['sql'] for query in context.captured_queries]
+        insert = next(
+            index for index, sql in enumerate(queries)
+            if sql.startswith('INSERT INTO "reviews_review"')
+        )
+        assert not any(
+            'FROM "reviews_review"' in sql for sql in queries[:insert]
+        ), 'Проверьте, что повторный отзыв не ищется перед вставкой.'
+        assert Review.objects.count() == 1
+
+    def test_02_concurrent_posts(self, admin_client, token_user):
+        from rest_framework.test import APIClient
+        from reviews.models import Review, Title
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        url = f'/api/v1/titles/{title_id}/reviews/'
+        barrier = threading.Barrier(THREADS)
+        statuses = []
+
+        def post(number):
+            client = APIClient()
+            client.credentials(
+                HTTP_AUTHORIZATION=f'Bearer {token_user["access"]}'
+            )
+            try:
+                barrier.wait()
+                response = client.post(
+                    url, data={'text': f'Отзыв {number}', 'score': 5}
+                )
+                statuses.append(response.status_code)
+            finally:
+                connections.close_all()
+
+        threads = [
+            threading.Thread(target=post, args=(number,))
+            for number in range(THREADS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(statuses) == (
+            [HTTPStatus.CREATED] + [HTTPStatus.BAD_REQUEST] * (THREADS - 1)
+        ), (
+            'Проверьте, что из одновременных отзывов одного автора к '
+            'произведению сохраняется один, остальные получают 400.'
+        )
+        assert Review.objects.filter(title_id=title_id).count() == 1
+        title = Title.objects.get(pk=title_id)
+        assert (title.reviews_count, title.rating_count) == (1, 1), (
+            'Проверьте, что отклонённые отзывы не меняют счётчики.'
+        )
@@ -0,0 +1,125 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_comments, create_single_comment
+
+
+@pytest.mark.django_db(transaction=True)
+class Test32TitleCounters:
+
+    def counts(self, client, title_id):
+        data = client.get(f'/api/v1/titles/{title_id}/').json()
+        return data['reviews_count'], data['comments_count']
+
+    def test_01_counters(self, admin_client, client, admin, user,
+                         user_client, moderator, moderator_client):
+        from reviews.counters import rebuild_counters
+        from reviews.models import Title
+        authors = {
+            admin: admin_client, user: user_client,
+            moderator: moderator_client,
+        }
+        _, reviews, titles = create_comments(admin_client, authors)
+        title_id = titles[0]['id']
+        reviews_url = f'/api/v1/titles/{title_id}/reviews/'
+        assert self.counts(client, title_id) == (3, 3), (
+            'Проверьте, что произведение показывает число отзывов и '
+            'комментариев.'
+        )
+        listed = {
+            item['id']: item
+            for item in client.get('/api/v1/titles/').json()['results']
+        }
+        assert (
+            listed[title_id]['reviews_count'],
+            listed[title_id]['comments_count'],
+        ) == (3, 3)
+
+        create_single_comment(
+            user_client, title_id, reviews[0]['id'], 'Ещё'
+        )
+        assert self.counts(client, title_id) == (3, 4)
+        review = client.get(f'{reviews_url}{reviews[0]["id"]}/').json()
+        assert review['comments_count'] == 4
+
+        response = admin_client.delete(f'{reviews_url}{reviews[0]["id"]}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert self.counts(client, title_id) == (2, 0), (
+            'Проверьте, что удаление отзыва вычитает его комментарии из '
+            'счётчика произведения.'
+        )
+
+        create_single_comment(
+            moderator_client, title_id, reviews[1]['id'], 'Пишу'
+        )
+        moderator.delete()
+        assert self.counts(client, title_id) == (1, 0), (
+            'Проверьте, что счётчики учитывают каскадное удаление автора.'
+        )
+
+        Title.objects.filter(pk=title_id).update(
+            reviews_count=0, comments_count=5
+        )
+        rebuild_counters()
+        assert self.counts(client, title_id) == (1, 0)
+
+    def test_02_ordering(self, admin_client, client, admin, user,
+                         user_client, moderator, moderator_client):
+        authors = {
+            admin: admin_client, user: user_client,
+            moderator: moderator_client,
+        }
+        _, reviews, titles = create_comments(admin_client, authors)
+        title_id = titles[0]['id']
+        create_single_comment(
+            user_client, title_id, reviews[2]['id'], 'Ещё'
+        )
+
+        for field in ('reviews_count', 'comments_count'):
+            response = client.get('/api/v1/titles/', {'ordering': f'-{field}'})
+            assert response.status_code == HTTPStatus.OK
+            assert response.json()['results'][0]['id'] == title_id, (
+                f'Проверьте, что произведения сортируются по `{field}`.'
+            )
+
+        response = client.get(
+            f'/api/v1/titles/{title_id}/reviews/',
+            {'ordering': '-comments_count'},
+        )
+        counts = [
+            item['comments_count'] for item in response.json()['results']
+        ]
+        assert counts == sorted(counts, reverse=True)
+        assert counts == [3, 1, 0]
+        assert response.json()['results'][0]['id'] == reviews[0]['id']
+
+    def test_03_atomic_comment(self, admin_client, user_client, user,
+                               monkeypatch):
+        from reviews import signals
+        from reviews.models import Comment, Review, Title
+        _, reviews, titles = create_comments(
+            admin_client, {user: user_client}
+        )
+        review_id = reviews[0]['id']
+        before = Review.objects.get(pk=review_id).comments_count
+        update_counters = signals.change_comments_count
+
+        def fail_after_review(review_id, title_id, delta):
+            update_counters(review_id, None, delta)
+            raise RuntimeError
+
+        monkeypatch.setattr(
+            signals, 'change_comments_count', fail_after_review
+        )
+        with pytest.raises(RuntimeError):
+            Comment.objects.create(
+                text='Ещё', author=user, review_id=review_id,
+                title_id=titles[0]['id'],
+            )
+        assert Comment.objects.filter(text='Ещё').count() == 0, (
+            'Проверьте, что комментарий и его счётчики сохраняются в одной '
+            'транзакции.'
+        )
+        assert Review.objects.get(pk=review_id).comments_count == before
+        assert Title.objects.get(pk=titles[0]['id']).comments_count == before
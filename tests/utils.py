@@ -305,3 +305,23 @@ def check_fields(obj_type, url_pattern, obj, expected_data, detail=False):
         f'данные {obj_types[obj_type]}{results_in_msg}. Поле `id` не '
         'найдено или не является целым числом.'
     )
+
+
+def create_many_titles(count):
+    from reviews.models import Category, Genres, GenreTitle, Title
+    category = Category.objects.create(name='Фильм', slug='film')
+    genres = [
+        Genres.objects.create(name=f'Жанр {idx}', slug=f'genre-{idx}')
+        for idx in range(3)
+    ]
+    titles = [
+        Title.objects.create(
+            name=f'Произведение {idx}', year=2000, category=category
+        )
+        for idx in range(count)
+    ]
+    GenreTitle.objects.bulk_create(
+        GenreTitle(title=title, genre=genre)
+        for title in titles for genre in genres
+    )
+    return titles